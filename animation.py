@@ -0,0 +1,78 @@
+import time
+from typing import Callable, Hashable, Optional
+from PySide6 import QtCore
+import telemetry
+
+FRAME_INTERVAL = 16 # Milliseconds between animation frames
+
+class Tween:
+    __slots__ = ('setter', 'start', 'end', 'duration', 'easing', 'begin')
+
+    def __init__(self, setter: Callable[[float], None], start: float, end: float, duration: int, easing: Optional[QtCore.QEasingCurve], begin: float):
+        self.setter = setter
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.begin = begin
+
+    def step(self, now: float) -> bool:
+        if now < self.begin:
+            return False
+        progress = min(1, (now - self.begin) * 1000 / self.duration)
+        eased = self.easing.valueForProgress(progress) if self.easing is not None else progress
+        self.setter(self.start + (self.end - self.start) * eased)
+        return progress >= 1
+
+class Timeline(QtCore.QObject):
+    """A single frame clock stepping every running animation."""
+
+    def __init__(self, interval: int = FRAME_INTERVAL):
+        super().__init__()
+        self.tweens = {}
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tick)
+        self.frames = 0
+        self.frame_time = 0.0
+        self.max_frame_time = 0.0
+        self.layout_passes = 0
+
+    def animate(self, owner: Hashable, name: str, setter: Callable[[float], None], start: float, end: float, duration: int, easing: Optional[QtCore.QEasingCurve] = None, delay: int = 0):
+        # A new animation of the same property replaces the running one
+        setter(start)
+        self.tweens[(owner, name)] = Tween(setter, start, end, duration, easing, time.monotonic() + delay / 1000)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def cancel(self, owner: Hashable):
+        for key in [ key for key in self.tweens if key[0] is owner ]:
+            del self.tweens[key]
+
+    def tick(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        for key, tween in list(self.tweens.items()):
+            if tween.step(now):
+                del self.tweens[key]
+        if not self.tweens:
+            self.timer.stop()
+        frame_time = time.perf_counter() - start
+        self.frames += 1
+        self.frame_time += frame_time
+        self.max_frame_time = max(self.max_frame_time, frame_time)
+        telemetry.record('frame', frame_time * 1000)
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'mean_frame_ms': self.frame_time / self.frames * 1000 if self.frames else 0,
+            'max_frame_ms': self.max_frame_time * 1000,
+            'layout_passes': self.layout_passes
+        }
+
+timeline = Timeline()
+
+OUT_BOUNCE = QtCore.QEasingCurve(QtCore.QEasingCurve.OutBounce)
+OUT_CURVE = QtCore.QEasingCurve(QtCore.QEasingCurve.OutCurve)
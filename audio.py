@@ -0,0 +1,570 @@
+import itertools
+import math
+import random
+import time
+import weakref
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+FLOWS = ('render', 'capture') # Indexed by EDataFlow
+
+class DeviceNotFound(LookupError):
+    """A control's endpoint is not connected. Never falls back to the default device."""
+
+class Device:
+    __slots__ = ('id', 'name', 'flow', 'is_default')
+
+    def __init__(self, id: str, name: str, flow: str = 'render', is_default: bool = False):
+        self.id = id
+        self.name = name
+        self.flow = flow
+        self.is_default = is_default
+
+    def __repr__(self):
+        return f'Device({self.id!r}, {self.name!r}, {self.flow!r})'
+
+    def to_dict(self) -> dict:
+        return { 'id': self.id, 'name': self.name, 'flow': self.flow, 'default': self.is_default }
+
+class AudioBackend:
+    stale_errors = () # Errors meaning a held interface has to be acquired again
+
+    def __init__(self):
+        self.device_id = None
+        self.endpoint_volumes = {} # device id: IAudioEndpointVolume, None is the default render device
+        self.session_volumes = weakref.WeakKeyDictionary()
+        self.session_meters = weakref.WeakKeyDictionary()
+        self.topology = None # Active devices, enumerated once and kept until a device changes
+        self.device_names = {}
+        self.watching_devices = False
+        self.device_listeners = [] # Called from any thread after the topology changed
+
+    def get_all_sessions(self) -> list:
+        raise NotImplementedError
+
+    def default_device_id(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def enumerate_devices(self) -> List[Device]:
+        """Returns the active render and capture devices."""
+        raise NotImplementedError
+
+    def subscribe_devices(self, changed: Callable[[], None]) -> bool:
+        """Calls changed from any thread when a device is added, removed or becomes the default. Returns False if notifications are unavailable."""
+        return False
+
+    def activate_endpoint(self, device_id: Optional[str] = None):
+        """Returns the IAudioEndpointVolume of a device, or of the default render device."""
+        raise NotImplementedError
+
+    def activate_session(self, session):
+        """Returns the ISimpleAudioVolume of a session."""
+        raise NotImplementedError
+
+    def activate_meter(self, session):
+        """Returns the IAudioMeterInformation of a session."""
+        raise NotImplementedError
+
+    def thread_init(self):
+        """Prepares the calling worker thread for backend calls."""
+        pass
+
+    def refresh(self):
+        # Without notifications the topology is enumerated again every time the overlay is shown
+        if not self.watching_devices:
+            self.topology = None
+        device_id = self.default_device_id()
+        if device_id != self.device_id:
+            # Before the first refresh the default interface was activated for the current default device
+            if self.device_id is not None:
+                self.endpoint_volumes.pop(None, None)
+            self.device_id = device_id
+
+    def devices(self) -> List[Device]:
+        topology = self.topology
+        if topology is None:
+            if not self.watching_devices:
+                self.watching_devices = self.subscribe_devices(self.invalidate_devices)
+            topology = self.enumerate_devices()
+            self.device_names = { device.name.lower(): device for device in topology }
+            self.topology = topology
+        return topology
+
+    def invalidate_devices(self):
+        # Interfaces of removed devices are stale, the rest are cheap to activate again after a change
+        self.topology = None
+        self.endpoint_volumes = {}
+        for listener in self.device_listeners:
+            listener()
+
+    def find_device(self, name: str, flow: Optional[str] = None) -> Optional[Device]:
+        """Finds an active device by id, by name, or by a part of its name, ignoring case."""
+        devices = [ device for device in self.devices() if flow is None or device.flow == flow ]
+        lower = name.lower()
+        for device in devices:
+            if device.id == name:
+                return device
+        device = self.device_names.get(lower)
+        if device is not None and device in devices:
+            return device
+        for device in devices:
+            if lower in device.name.lower():
+                return device
+        return None
+
+    def session_device(self, session) -> Optional[str]:
+        """Returns the id of the render device a session plays on."""
+        return getattr(session, 'device_id', None) or self.device_id
+
+    def endpoint_device(self, endpoint: str) -> Optional[str]:
+        """Returns the device id of a control's endpoint, None for the default render device. Raises DeviceNotFound if it is not connected."""
+        if not endpoint:
+            return None
+        device = self.find_device(endpoint)
+        if device is None:
+            raise DeviceNotFound(f'No connected audio device matches {endpoint!r}')
+        return device.id
+
+    def endpoint_volume(self, device_id: Optional[str] = None):
+        volume = self.endpoint_volumes.get(device_id)
+        if volume is None:
+            volume = self.endpoint_volumes[device_id] = self.activate_endpoint(device_id)
+        return volume
+
+    def session_volume(self, session):
+        volume = self.session_volumes.get(session)
+        if volume is None:
+            volume = self.session_volumes[session] = self.activate_session(session)
+        return volume
+
+    def session_meter(self, session):
+        meter = self.session_meters.get(session)
+        if meter is None:
+            meter = self.session_meters[session] = self.activate_meter(session)
+        return meter
+
+    def call_endpoint(self, method: str, *args, device: Optional[str] = None):
+        try:
+            return getattr(self.endpoint_volume(device), method)(*args)
+        except self.stale_errors:
+            self.endpoint_volumes.pop(device, None)
+            return getattr(self.endpoint_volume(device), method)(*args)
+
+    def call_session(self, session, method: str, *args):
+        try:
+            return getattr(self.session_volume(session), method)(*args)
+        except self.stale_errors:
+            self.session_volumes.pop(session, None)
+            return getattr(self.session_volume(session), method)(*args)
+
+    def get_master_mute(self, device: Optional[str] = None) -> bool:
+        return bool(self.call_endpoint('GetMute', device=device))
+
+    def set_master_mute(self, mute: bool, device: Optional[str] = None):
+        self.call_endpoint('SetMute', mute, None, device=device)
+
+    def get_session_mute(self, session) -> bool:
+        return bool(self.call_session(session, 'GetMute'))
+
+    def set_session_mute(self, session, mute: bool):
+        self.call_session(session, 'SetMute', mute, None)
+
+    def get_session_peak(self, session) -> float:
+        try:
+            return self.session_meter(session).GetPeakValue()
+        except self.stale_errors:
+            self.session_meters.pop(session, None)
+            return self.session_meter(session).GetPeakValue()
+
+    def process_id(self, session) -> int:
+        return session.ProcessId
+
+    def process_name(self, session) -> Optional[str]:
+        return session.Process.name() if session.Process is not None else None
+
+    def process_key(self, session) -> Optional[Tuple[int, float]]:
+        # The create time is read once when the process handle is made, so this is not an OS call
+        return (session.ProcessId, session.Process.create_time()) if session.Process is not None else None
+
+    def process_snapshot(self, pids: List[int]) -> Dict[int, Tuple[str, str]]:
+        """Returns pid: (exe name, exe path) for the given pids from one process enumeration."""
+        raise NotImplementedError
+
+    def get_master_volume(self, device: Optional[str] = None) -> float:
+        return self.call_endpoint('GetMasterVolumeLevelScalar', device=device)
+
+    def set_master_volume(self, level: float, device: Optional[str] = None):
+        self.call_endpoint('SetMasterVolumeLevelScalar', level, None, device=device)
+
+    def get_session_volume(self, session) -> float:
+        return self.call_session(session, 'GetMasterVolume')
+
+    def set_session_volume(self, session, level: float):
+        self.call_session(session, 'SetMasterVolume', level, None)
+
+class WindowsAudioBackend(AudioBackend):
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from _ctypes import COMError
+        from comtypes import CLSCTX_ALL
+        import psutil
+        from pycaw.pycaw import (
+            AudioSession, AudioUtilities, DEVICE_STATE, EDataFlow, ERole, IAudioEndpointVolume, IAudioMeterInformation,
+            IAudioSessionControl2, IAudioSessionManager2, IMMEndpoint
+        )
+        self.ctypes = ctypes
+        self.psutil = psutil
+        self.CLSCTX_ALL = CLSCTX_ALL
+        self.AudioSession = AudioSession
+        self.AudioUtilities = AudioUtilities
+        self.DEVICE_STATE = DEVICE_STATE
+        self.EDataFlow = EDataFlow
+        self.ERole = ERole
+        self.IAudioEndpointVolume = IAudioEndpointVolume
+        self.IAudioMeterInformation = IAudioMeterInformation
+        self.IAudioSessionControl2 = IAudioSessionControl2
+        self.IAudioSessionManager2 = IAudioSessionManager2
+        self.IMMEndpoint = IMMEndpoint
+        self.stale_errors = (COMError,)
+        self.session_managers = {} # device id: IAudioSessionManager2
+        self.device_notification = None
+
+    def thread_init(self):
+        import comtypes
+        comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+
+    def invalidate_devices(self):
+        super().invalidate_devices()
+        self.session_managers = {}
+
+    def session_manager(self, device_id: str):
+        manager = self.session_managers.get(device_id)
+        if manager is None:
+            device = self.AudioUtilities.GetDeviceEnumerator().GetDevice(device_id)
+            interface = device.Activate(self.IAudioSessionManager2._iid_, self.CLSCTX_ALL, None)
+            manager = self.session_managers[device_id] = interface.QueryInterface(self.IAudioSessionManager2)
+        return manager
+
+    def create_session(self, control, device_id: str):
+        session = self.AudioSession(control.QueryInterface(self.IAudioSessionControl2))
+        session.device_id = device_id
+        return session
+
+    def get_all_sessions(self) -> list:
+        # Sessions of every render device, each tagged with the device it plays on
+        sessions = []
+        for device in self.devices():
+            if device.flow != 'render':
+                continue
+            enumerator = self.session_manager(device.id).GetSessionEnumerator()
+            for i in range(enumerator.GetCount()):
+                control = enumerator.GetSession(i)
+                if control is not None:
+                    sessions.append(self.create_session(control, device.id))
+        return sessions
+
+    def default_device_id(self) -> Optional[str]:
+        return self.AudioUtilities.GetSpeakers().GetId()
+
+    def enumerate_devices(self) -> List[Device]:
+        enumerator = self.AudioUtilities.GetDeviceEnumerator()
+        defaults = set()
+        for flow in (self.EDataFlow.eRender.value, self.EDataFlow.eCapture.value):
+            try:
+                defaults.add(enumerator.GetDefaultAudioEndpoint(flow, self.ERole.eMultimedia.value).GetId())
+            except self.stale_errors:
+                pass # No device of this flow
+        collection = enumerator.EnumAudioEndpoints(self.EDataFlow.eAll.value, self.DEVICE_STATE.ACTIVE.value)
+        devices = []
+        for i in range(collection.GetCount()):
+            device = collection.Item(i)
+            device_id = device.GetId()
+            flow = FLOWS[device.QueryInterface(self.IMMEndpoint).GetDataFlow()]
+            name = self.AudioUtilities.CreateDevice(device).FriendlyName or device_id
+            devices.append(Device(device_id, name, flow, device_id in defaults))
+        return devices
+
+    def subscribe_devices(self, changed: Callable[[], None]) -> bool:
+        try:
+            from comtypes import COMObject
+            from pycaw.pycaw import IMMNotificationClient
+        except ImportError:
+            return False
+
+        class DeviceNotification(COMObject):
+            _com_interfaces_ = [ IMMNotificationClient ]
+
+            def OnDeviceStateChanged(self, device_id, new_state):
+                changed()
+
+            def OnDeviceAdded(self, device_id):
+                changed()
+
+            def OnDeviceRemoved(self, device_id):
+                changed()
+
+            def OnDefaultDeviceChanged(self, flow, role, device_id):
+                changed()
+
+            def OnPropertyValueChanged(self, device_id, key):
+                pass # Fires for every property, names rarely change
+
+        # The enumerator has to stay alive for notifications to be delivered
+        self.device_enumerator = self.AudioUtilities.GetDeviceEnumerator()
+        self.device_notification = DeviceNotification()
+        self.device_enumerator.RegisterEndpointNotificationCallback(self.device_notification)
+        return True
+
+    def activate_endpoint(self, device_id: Optional[str] = None):
+        if device_id is None:
+            device = self.AudioUtilities.GetSpeakers()
+        else:
+            device = self.AudioUtilities.GetDeviceEnumerator().GetDevice(device_id)
+        interface = device.Activate(self.IAudioEndpointVolume._iid_, self.CLSCTX_ALL, None)
+        return self.ctypes.cast(interface, self.ctypes.POINTER(self.IAudioEndpointVolume))
+
+    def activate_session(self, session):
+        return session.SimpleAudioVolume
+
+    def activate_meter(self, session):
+        return session._ctl.QueryInterface(self.IAudioMeterInformation)
+
+    def process_snapshot(self, pids: List[int]) -> Dict[int, Tuple[str, str]]:
+        # Only the pid list covers every process, names and paths are read for the wanted ones alone
+        snapshot = {}
+        for pid in set(pids).intersection(self.psutil.pids()):
+            try:
+                process = self.psutil.Process(pid)
+                name = process.name()
+            except self.psutil.Error:
+                continue
+            try:
+                exe = process.exe()
+            except self.psutil.Error:
+                exe = '' # Denied for elevated processes, the name is enough to match them
+            snapshot[pid] = (name or '', exe or '')
+        return snapshot
+
+FAKE_DEVICES = [ ('speakers', 'Speakers', 'render'), ('headphones', 'Headphones', 'render'), ('microphone', 'Microphone', 'capture') ]
+FAKE_APPS = [ 'chrome', 'firefox', 'msedge', 'discord', 'spotify', 'vlc', 'obs64', 'steam', 'teams', 'zoom', 'slack', 'foobar2000' ]
+
+class FakeProcess:
+    def __init__(self, pid: int, name: str, create_time: float = 1700000000.0):
+        self.pid = pid
+        self._name = name
+        self._create_time = create_time
+        self.backend = None
+
+    def create_time(self) -> float:
+        return self._create_time
+
+    def name(self) -> str:
+        if self.backend is not None:
+            self.backend.call('ProcessName')
+        return self._name
+
+class FakeSession:
+    ids = itertools.count()
+
+    def __init__(self, pid: int, name: str, volume: float = 1.0, display_name: str = '', peak: Optional[float] = None, device_id: Optional[str] = None):
+        self.InstanceIdentifier = f'fake|{pid}|{next(self.ids)}'
+        self.device_id = device_id # None plays on the default render device
+        self.ProcessId = pid
+        self.Process = FakeProcess(pid, name) if name else None
+        self.DisplayName = display_name
+        self.volume = volume
+        self.muted = False
+        self.peak = peak # None plays a synthetic signal
+
+    def synthetic_peak(self, t: float) -> float:
+        # A repeatable signal per pid, every third process is silent
+        if self.ProcessId % 3 == 0:
+            return 0.0
+        return abs(math.sin(t * (1 + self.ProcessId % 7))) * self.volume
+
+class FakeSimpleAudioVolume:
+    def __init__(self, backend: 'FakeAudioBackend', session: FakeSession):
+        self.backend = backend
+        self.session = session
+
+    def GetMasterVolume(self) -> float:
+        self.backend.call('GetMasterVolume')
+        return self.session.volume
+
+    def SetMasterVolume(self, level: float, context):
+        self.backend.call('SetMasterVolume')
+        self.session.volume = level
+
+    def GetMute(self) -> bool:
+        self.backend.call('GetMute')
+        return self.session.muted
+
+    def SetMute(self, mute: bool, context):
+        self.backend.call('SetMute')
+        self.session.muted = mute
+
+class FakeAudioMeter:
+    def __init__(self, backend: 'FakeAudioBackend', session: FakeSession):
+        self.backend = backend
+        self.session = session
+
+    def GetPeakValue(self) -> float:
+        self.backend.call('GetPeakValue')
+        return self.session.peak if self.session.peak is not None else self.session.synthetic_peak(time.monotonic())
+
+class FakeDevice(Device):
+    __slots__ = ('master', 'muted', 'active')
+
+    def __init__(self, id: str, name: str, flow: str = 'render', master: float = 1.0):
+        super().__init__(id, name, flow)
+        self.master = master
+        self.muted = False
+        self.active = True
+
+class FakeEndpointVolume:
+    def __init__(self, backend: 'FakeAudioBackend', device: FakeDevice):
+        self.backend = backend
+        self.device = device
+
+    def call(self, name: str):
+        # Like an invalidated interface, a removed device fails every call
+        self.backend.call(name)
+        if not self.device.active:
+            raise DeviceNotFound(f'{self.device.id} was removed')
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        self.call('GetMasterVolumeLevelScalar')
+        return self.device.master
+
+    def SetMasterVolumeLevelScalar(self, level: float, context):
+        self.call('SetMasterVolumeLevelScalar')
+        self.device.master = level
+
+    def GetMute(self) -> bool:
+        self.call('GetMute')
+        return self.device.muted
+
+    def SetMute(self, mute: bool, context):
+        self.call('SetMute')
+        self.device.muted = mute
+
+class FakeAudioBackend(AudioBackend):
+    """An in memory backend, every call is counted and can be given a latency in seconds, or a function returning one.
+
+    devices are (id, name, flow) tuples, the default render device is the one with device_id.
+    """
+
+    def __init__(self, sessions: List[FakeSession] = None, master: float = 1.0, device_id: str = 'speakers', latency: float = 0.0, latencies: Dict[str, Union[float, Callable[[], float]]] = None, devices: List[Tuple[str, str, str]] = None, notifications: bool = True):
+        super().__init__()
+        self.sessions = []
+        self.device = device_id
+        self.fake_devices = { id: FakeDevice(id, name, flow) for id, name, flow in devices or [ (device_id, 'Speakers', 'render') ] }
+        if device_id not in self.fake_devices:
+            self.fake_devices[device_id] = FakeDevice(device_id, device_id.capitalize())
+        self.master = master
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.calls = Counter()
+        self.notifications = notifications
+        self.device_changed = None
+        for session in sessions or []:
+            self.add_session(session)
+
+    @classmethod
+    def generate(cls, count: int, seed: int = 0, **kwargs) -> 'FakeAudioBackend':
+        """Builds a backend with count sessions spread over the render devices, the same seed always gives the same sessions."""
+        rng = random.Random(seed)
+        render = [ id for id, name, flow in kwargs.get('devices') or [] if flow == 'render' ] or [ None ]
+        sessions = [ FakeSession(1000 + i, f'{rng.choice(FAKE_APPS)}.exe', round(rng.random(), 2), device_id=render[i % len(render)]) for i in range(count) ]
+        return cls(sessions, **kwargs)
+
+    # The master level and mute of the default render device
+    @property
+    def master(self) -> float:
+        return self.fake_devices[self.device].master
+
+    @master.setter
+    def master(self, level: float):
+        self.fake_devices[self.device].master = level
+
+    @property
+    def muted(self) -> bool:
+        return self.fake_devices[self.device].muted
+
+    @muted.setter
+    def muted(self, mute: bool):
+        self.fake_devices[self.device].muted = mute
+
+    def change_devices(self):
+        if self.device_changed is not None:
+            self.device_changed()
+
+    def add_device(self, device_id: str, name: str, flow: str = 'render', master: float = 1.0) -> FakeDevice:
+        device = self.fake_devices[device_id] = FakeDevice(device_id, name, flow, master)
+        self.change_devices()
+        return device
+
+    def remove_device(self, device_id: str):
+        self.fake_devices[device_id].active = False
+        self.change_devices()
+
+    def set_default_device(self, device_id: str):
+        self.device = device_id
+        self.change_devices()
+
+    def add_session(self, session: FakeSession):
+        if session.Process is not None:
+            session.Process.backend = self
+        self.sessions.append(session)
+
+    def call(self, name: str):
+        self.calls[name] += 1
+        latency = self.latencies.get(name, self.latency)
+        if callable(latency):
+            latency = latency()
+        if latency > 0:
+            time.sleep(latency)
+
+    def get_all_sessions(self) -> list:
+        self.call('GetAllSessions')
+        return list(self.sessions)
+
+    def default_device_id(self) -> Optional[str]:
+        return self.device
+
+    def enumerate_devices(self) -> List[Device]:
+        self.call('EnumAudioEndpoints')
+        defaults = { self.device } | { next((device.id for device in self.fake_devices.values() if device.flow == 'capture' and device.active), None) }
+        return [ Device(device.id, device.name, device.flow, device.id in defaults) for device in self.fake_devices.values() if device.active ]
+
+    def subscribe_devices(self, changed: Callable[[], None]) -> bool:
+        if self.notifications:
+            self.device_changed = changed
+        return self.notifications
+
+    def session_device(self, session) -> Optional[str]:
+        return session.device_id or self.device
+
+    def activate_endpoint(self, device_id: Optional[str] = None):
+        self.call('ActivateEndpoint')
+        device = self.fake_devices.get(device_id or self.device)
+        if device is None or not device.active:
+            raise DeviceNotFound(f'{device_id} is not connected')
+        return FakeEndpointVolume(self, device)
+
+    def activate_session(self, session):
+        self.call('ActivateSession')
+        return FakeSimpleAudioVolume(self, session)
+
+    def activate_meter(self, session):
+        self.call('ActivateMeter')
+        return FakeAudioMeter(self, session)
+
+    def process_snapshot(self, pids: List[int]) -> Dict[int, Tuple[str, str]]:
+        self.call('ProcessSnapshot')
+        wanted = set(pids)
+        return {
+            session.ProcessId: (session.Process._name, f'C:\\Program Files\\{session.Process._name[:-4]}\\{session.Process._name}')
+            for session in self.sessions if session.Process is not None and session.ProcessId in wanted
+        }
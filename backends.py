@@ -0,0 +1,23 @@
+import sys
+from typing import NamedTuple
+from audio import FAKE_DEVICES, AudioBackend, FakeAudioBackend, WindowsAudioBackend
+from titles import FakeWindowBackend, Win32WindowBackend, WindowBackend
+from sessions import FakeSessionSource, SessionSource, WindowsSessionSource
+
+
+class Backends(NamedTuple):
+    audio: AudioBackend
+    windows: WindowBackend
+    sessions: SessionSource
+
+def create_backends(kind: str = 'auto', session_count: int = 10, latency: float = 0.0, seed: int = 0) -> Backends:
+    """Creates the audio, window and session backends, 'auto' picks windows on Windows and fake elsewhere."""
+    if kind == 'auto':
+        kind = 'windows' if sys.platform == 'win32' else 'fake'
+    if kind == 'windows':
+        audio = WindowsAudioBackend()
+        return Backends(audio, Win32WindowBackend(), WindowsSessionSource(audio))
+    if kind == 'fake':
+        audio = FakeAudioBackend.generate(session_count, seed, latency=latency, devices=FAKE_DEVICES)
+        return Backends(audio, FakeWindowBackend.for_sessions(audio.sessions, latency), FakeSessionSource(audio))
+    raise ValueError(f'Unknown backend {kind!r}')
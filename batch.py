@@ -0,0 +1,138 @@
+import socketserver
+import sys
+from typing import List, Optional, Tuple
+from ujson import dumps as json_dumps
+import config
+from backends import create_backends
+from matcher import SessionMatcher, SteamGameIndex
+from steamgames import load_steamgames_cache
+from volume import GroupVolume
+
+COMMANDS = ('set', 'adjust', 'mute', 'unmute', 'query', 'devices')
+
+class CommandError(ValueError):
+    pass
+
+def parse_command(text: str) -> Tuple[str, str, Optional[float]]:
+    """Parses '<command> <control> [percent]', control names may contain spaces."""
+    words = text.split()
+    if not words or words[0].lower() not in COMMANDS:
+        raise CommandError(f'Unknown command {text.strip()!r}, expected one of {", ".join(COMMANDS)}')
+    command = words[0].lower()
+    if command == 'devices':
+        return command, '', None
+    if command in ('set', 'adjust'):
+        if len(words) < 3:
+            raise CommandError(f'{command} needs a control and a percentage')
+        try:
+            value = float(words[-1].rstrip('%')) / 100
+        except ValueError:
+            raise CommandError(f'{words[-1]!r} is not a percentage')
+        return command, ' '.join(words[1:-1]), value
+    if len(words) < 2:
+        raise CommandError(f'{command} needs a control')
+    return command, ' '.join(words[1:]), None
+
+class BatchRunner:
+    """Runs volume commands against the configured controls without the GUI.
+
+    Every batch is resolved against a single session snapshot.
+    """
+
+    def __init__(self, backend, steam_games: SteamGameIndex):
+        self.backend = backend
+        self.matcher = SessionMatcher(config.CONTROLS, steam_games, config.BUTTON_COUNT)
+
+    def find(self, matches: list, name: str) -> Tuple[config.Control, list]:
+        # Controls are addressed by name, or by their position like the number keys
+        if name.isdigit() and 0 < int(name) <= len(matches):
+            return matches[int(name) - 1]
+        for control, sessions in matches:
+            if control.name.lower() == name.lower():
+                return control, sessions
+        raise CommandError(f'No control named {name!r}')
+
+    def run(self, commands: List[str]) -> List[dict]:
+        self.backend.refresh()
+        matches = self.matcher.match(self.backend.get_all_sessions(), devices=self.backend)
+        return [ self.run_command(matches, text) for text in commands ]
+
+    def run_command(self, matches: list, text: str) -> dict:
+        try:
+            command, name, value = parse_command(text)
+            if command == 'devices':
+                return { 'command': command, 'devices': [ device.to_dict() for device in self.backend.devices() ] }
+            control, sessions = self.find(matches, name)
+            if control.master:
+                return self.run_master(command, control, value)
+            return self.run_sessions(command, control, sessions, value)
+        except CommandError as e:
+            return { 'command': text.strip(), 'error': str(e) }
+        except Exception as e:
+            return { 'command': text.strip(), 'error': f'{type(e).__name__}: {e}' }
+
+    def run_master(self, command: str, control: config.Control, value: Optional[float]) -> dict:
+        device = self.backend.endpoint_device(control.endpoint)
+        level = self.backend.get_master_volume(device)
+        if command in ('set', 'adjust'):
+            level = max(0, min(1, value if command == 'set' else level + value))
+            self.backend.set_master_volume(level, device)
+        elif command in ('mute', 'unmute'):
+            self.backend.set_master_mute(command == 'mute', device)
+        return { 'command': command, 'control': control.name, 'level': round(float(level), 4), 'muted': self.backend.get_master_mute(device), 'sessions': 0 }
+
+    def run_sessions(self, command: str, control: config.Control, sessions: list, value: Optional[float]) -> dict:
+        # Sessions of a control move together and keep their relative levels, like in the overlay
+        group = GroupVolume({ session: self.backend.get_session_volume(session) for session in sessions })
+        if command in ('set', 'adjust') and sessions:
+            levels = group.step((value - group.level) if command == 'set' else value)
+            for session, level in (levels or {}).items():
+                self.backend.set_session_volume(session, level)
+        elif command in ('mute', 'unmute'):
+            for session in sessions:
+                self.backend.set_session_mute(session, command == 'mute')
+        muted = all(self.backend.get_session_mute(session) for session in sessions) if sessions else False
+        return { 'command': command, 'control': control.name, 'level': round(float(group.level), 4) if sessions else None, 'muted': muted, 'sessions': len(sessions) }
+
+def split_commands(text: str) -> List[str]:
+    return [ command for command in (part.strip() for part in text.replace('\n', ';').split(';')) if command ]
+
+def create_runner() -> BatchRunner:
+    backends = create_backends(config.BACKEND, config.FAKE_SESSION_COUNT, config.FAKE_LATENCY / 1000)
+    steam_games = SteamGameIndex([])
+    if any(control.targets[1] for control in config.CONTROLS):
+        steam_games = SteamGameIndex.from_cache(load_steamgames_cache(
+            config.STEAM_LIBRARY_FOLDERS,
+            config.STEAM_GAME_CACHE_FILE,
+            config.STEAM_GAME_CACHE_TIMEOUT,
+            config.STEAMAPP_EXLUSIONS,
+            config.STEAM_LIBRARY_INDEX_FILE,
+            False
+        ))
+    return BatchRunner(backends.audio, steam_games)
+
+class BatchHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            results = self.server.runner.run(split_commands(line.decode()))
+            self.wfile.write((json_dumps(results) + '\n').encode())
+
+def serve(runner: BatchRunner, port: int):
+    """Answers every line of commands with a JSON list of results, one connection at a time."""
+    with socketserver.TCPServer(('127.0.0.1', port), BatchHandler) as server:
+        server.runner = runner
+        print(f'Listening for volume commands on 127.0.0.1:{port}')
+        server.serve_forever()
+
+def main(argv: List[str]) -> int:
+    runner = create_runner()
+    if '--batch-server' in argv:
+        serve(runner, config.BATCH_PORT)
+        return 0
+    text = argv[argv.index('--batch') + 1] if argv.index('--batch') + 1 < len(argv) else '-'
+    if text == '-':
+        text = sys.stdin.read()
+    results = runner.run(split_commands(text))
+    for result in results:
+        print(json_dumps(result))
+    return 1 if any('error' in result for result in results) else 0
@@ -0,0 +1,368 @@
+import hashlib
+import os
+import pickle
+import re
+from os import environ, path
+from typing import List, Optional, Tuple
+from ujson import loads as json_loads, dump as json_dump
+from matcher import classify_targets
+
+BUTTON_COUNT = 8
+MIN_WIDTH = 432
+MAIN_MARGIN = 25
+CONTROL_MARGIN = 35
+CLOSE_ON_DESELECT = True
+MONITOR = 1
+DEBUG = False
+AUTO_FILL = True
+AUTO_CLOSE = True
+GET_STEAM_GAMES = False # Force steam game collection despite cache
+STEAM_GAME_CACHE_TIMEOUT = 7200 # cache timeout in minutes
+CONFIG_FILE = 'conf.json'
+CONFIG_CACHE_FILE = 'conf.cache'
+CONFIG_CACHE_VERSION = 5
+STEAM_GAME_CACHE_FILE = 'games.cache'
+STEAM_LIBRARY_INDEX_FILE = 'games.index'
+CONTROLS_FILE = 'controls.json'
+OVERRIDE_STEAMAPP_EXLUSIONS = False
+STEAM_LIBRARY_FOLDERS = [ path.join(environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)'), 'Steam') ]
+STEAMAPP_EXLUSIONS = []
+FG_COLOR = '#111'
+BG_COLOR = '#eee'
+SHOW_PROCESS_COUNT = True
+SPACER_POSITION = 0
+SHADE_WIDTH = 600 # Width of the shade to the right of the controls
+SESSION_POLL_INTERVAL = 250 # How often session changes are applied in milliseconds
+VOLUME_WRITE_INTERVAL = 16 # Minimum time between volume writes in milliseconds
+VOLUME_WORKERS = 4 # Threads the session volumes of one control are set on
+PEAK_METERS = True # Show live peak meters, needs numpy
+PEAK_METER_INTERVAL = 33 # Peak sampling interval in milliseconds
+RANK_AUTO_FILL = True # Fill auto fill slots with the busiest and most used apps first
+USAGE_HISTORY_FILE = 'usage.json'
+USAGE_HALF_LIFE = 72 # Hours until a recorded use counts half
+RESIDENT = False # Keep the overlay alive in the background and show it on request
+SERVER_NAME = 'AudioMixerOverlay'
+WATCH_CONFIG = True # Apply changes to the config file while running
+BATCH_PORT = 47811 # Local port of --batch-server
+TIMING = False # Record cold start and warm show latency
+TIMING_LOG_FILE = 'timing.log'
+BACKEND = 'auto' # Audio and window backend, see BACKENDS
+BACKENDS = ('auto', 'windows', 'fake')
+FAKE_SESSION_COUNT = 10 # Sessions simulated by the fake backend
+FAKE_LATENCY = 0 # Simulated latency of every fake backend call in milliseconds
+TELEMETRY = '' # File or udp://host:port telemetry is written to, disabled when empty
+TRACE_FILE = '' # Record a replayable trace to this file, disabled when empty
+
+class ConfigError(ValueError):
+    pass
+
+# Config key: (setting, accepted types)
+SETTINGS = {
+    'debug': ('DEBUG', bool),
+    'monitor': ('MONITOR', int),
+    'control_count': ('BUTTON_COUNT', int),
+    'button_count': ('BUTTON_COUNT', int),
+    'auto_close': ('AUTO_CLOSE', bool),
+    'steam_library_folders': ('STEAM_LIBRARY_FOLDERS', list),
+    'get_steam_games': ('GET_STEAM_GAMES', bool),
+    'steam_game_cache_timeout': ('STEAM_GAME_CACHE_TIMEOUT', (int, float)),
+    'steam_game_cache_file': ('STEAM_GAME_CACHE_FILE', str),
+    'steam_library_index_file': ('STEAM_LIBRARY_INDEX_FILE', str),
+    'steamapp_exlusions': ('STEAMAPP_EXLUSIONS', list),
+    'override_steamapp_exlusions': ('OVERRIDE_STEAMAPP_EXLUSIONS', bool),
+    'fg_color': ('FG_COLOR', str),
+    'bg_color': ('BG_COLOR', str),
+    'show_process_count': ('SHOW_PROCESS_COUNT', bool),
+    'min_width': ('MIN_WIDTH', int),
+    'spacer_position': ('SPACER_POSITION', int),
+    'shade_width': ('SHADE_WIDTH', int),
+    'close_on_deselect': ('CLOSE_ON_DESELECT', bool),
+    'volume_write_interval': ('VOLUME_WRITE_INTERVAL', (int, float)),
+    'volume_workers': ('VOLUME_WORKERS', int),
+    'peak_meters': ('PEAK_METERS', bool),
+    'peak_meter_interval': ('PEAK_METER_INTERVAL', (int, float)),
+    'rank_auto_fill': ('RANK_AUTO_FILL', bool),
+    'usage_history_file': ('USAGE_HISTORY_FILE', str),
+    'usage_half_life': ('USAGE_HALF_LIFE', (int, float)),
+    'resident': ('RESIDENT', bool),
+    'watch_config': ('WATCH_CONFIG', bool),
+    'batch_port': ('BATCH_PORT', int),
+    'timing': ('TIMING', bool),
+    'timing_log_file': ('TIMING_LOG_FILE', str),
+    'backend': ('BACKEND', str),
+    'fake_session_count': ('FAKE_SESSION_COUNT', int),
+    'fake_latency': ('FAKE_LATENCY', (int, float)),
+    'telemetry': ('TELEMETRY', str),
+    'trace_file': ('TRACE_FILE', str),
+    'auto_fill': ('AUTO_FILL', bool),
+    'auto_fill_control': (None, dict),
+    'controls': (None, list)
+}
+
+# Restored before a reload, so settings removed from the file go back to their defaults
+DEFAULTS = { name: globals()[name] for name, _ in SETTINGS.values() if name is not None }
+
+CONTROL_SCHEMA = {
+    'name': str,
+    'target_applications': list,
+    'use_app_title': bool,
+    'use_app_name': bool,
+    'only_first': bool,
+    'exclude': bool,
+    'master': bool,
+    'endpoint': str,
+    'fg_color': str,
+    'bg_color': str,
+    'bg_color2': str
+}
+
+def parse_color(value: str) -> Optional[Tuple[int, int, int, int]]:
+    """Parses the hex color formats QColor accepts into RGBA, other color names are left to QColor."""
+    if value == 'transparent':
+        return (0, 0, 0, 0)
+    if not value.startswith('#'):
+        return None
+    h = value[1:]
+    try:
+        if len(h) == 3:
+            return (int(h[0] * 2, 16), int(h[1] * 2, 16), int(h[2] * 2, 16), 255)
+        if len(h) == 6:
+            return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16), 255)
+        if len(h) == 8:
+            return (int(h[2:4], 16), int(h[4:6], 16), int(h[6:8], 16), int(h[0:2], 16))
+    except ValueError:
+        pass
+    return None
+
+class Control:
+    __slots__ = (
+        'name', 'target_applications', 'use_app_title', 'use_app_name', 'only_first', 'exclude', 'master', 'endpoint',
+        'fg_color', 'bg_color', 'bg_color2', 'fg_rgba', 'bg_rgba', 'bg2_rgba', 'targets'
+    )
+
+    def __init__(
+        self,
+        name: str,
+        target_applications: List[str],
+        use_app_title: bool = False, # Use app title instead of control name
+        use_app_name: bool = True, # Use app name instead of control name
+        only_first: bool = False, # Only change the volume of the first target app
+        exclude: bool = False, # App list is inverted, changes all volumes except listed
+        master: bool = False, # Master volume
+        endpoint: str = '', # Device name or id, master volume of this device or only sessions playing on it
+        fg_color: str = '', # Text color
+        bg_color: str = '', # Background color
+        bg_color2: str = '' # Background gradient color
+    ):
+        init = object.__setattr__
+        init(self, 'name', name)
+        init(self, 'target_applications', tuple(app.lower() for app in target_applications))
+        init(self, 'use_app_title', use_app_title)
+        init(self, 'use_app_name', use_app_name)
+        init(self, 'only_first', only_first)
+        init(self, 'exclude', exclude)
+        init(self, 'master', master)
+        init(self, 'endpoint', endpoint)
+        init(self, 'fg_color', fg_color or FG_COLOR)
+        init(self, 'bg_color', bg_color or BG_COLOR)
+        init(self, 'bg_color2', bg_color2)
+        init(self, 'fg_rgba', parse_color(self.fg_color))
+        init(self, 'bg_rgba', parse_color(self.bg_color))
+        init(self, 'bg2_rgba', parse_color(bg_color2) if bg_color2 else None)
+        init(self, 'targets', classify_targets(self.target_applications))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Control is immutable')
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            object.__setattr__(self, slot, value)
+
+    def __repr__(self):
+        return f'Control({self.name!r}, {list(self.target_applications)!r})'
+
+    def to_dict(self) -> dict:
+        return { key: list(getattr(self, key)) if key == 'target_applications' else getattr(self, key) for key in CONTROL_SCHEMA }
+
+def default_controls() -> Tuple[List[Control], Control]:
+    # Built again when parsing, so they take the configured default colors
+    return [
+        Control("Game", [ '<steamgame>' ]),
+        Control("Discord", [ 'discord' ], use_app_name=False)
+    ], Control("App", [ '<all>' ], False, True, True)
+
+CONTROLS, AUTO_FILL_CONTROL = default_controls()
+
+DEFAULTS.update(CONTROLS=CONTROLS, AUTO_FILL_CONTROL=AUTO_FILL_CONTROL)
+
+def check_type(errors: List[str], where: str, value, types) -> bool:
+    # bool is an int, but an int setting should not accept true or false
+    if isinstance(value, bool) and bool not in (types if isinstance(types, tuple) else (types,)):
+        ok = False
+    else:
+        ok = isinstance(value, types)
+    if not ok:
+        expected = ' or '.join(t.__name__ for t in (types if isinstance(types, tuple) else (types,)))
+        errors.append(f'{where}: expected {expected}, got {type(value).__name__}')
+    return ok
+
+def parse_control(errors: List[str], where: str, cd, default_name: str) -> Optional[Control]:
+    if not check_type(errors, where, cd, dict):
+        return None
+    count = len(errors)
+    for key, value in cd.items():
+        if key not in CONTROL_SCHEMA:
+            print(f'Ignoring unknown config key {where}.{key}')
+        elif check_type(errors, f'{where}.{key}', value, CONTROL_SCHEMA[key]) and key == 'target_applications':
+            for i, app in enumerate(value):
+                if not isinstance(app, str) or not app:
+                    errors.append(f'{where}.target_applications[{i}]: expected a non empty string')
+    if len(errors) > count:
+        return None # Already reported, a Control could not be built from these values
+    try:
+        return Control(
+            name=cd.get('name') or default_name,
+            target_applications=cd.get('target_applications') or [],
+            use_app_title=cd.get('use_app_title') or False,
+            use_app_name=cd.get('use_app_name') or False,
+            only_first=cd.get('only_first') or False,
+            exclude=cd.get('exclude') or False,
+            master=cd.get('master') or False,
+            endpoint=cd.get('endpoint') or '',
+            fg_color=cd.get('fg_color') or FG_COLOR,
+            bg_color=cd.get('bg_color') or BG_COLOR,
+            bg_color2=cd.get('bg_color2') or ''
+        )
+    except (re.error, TypeError, AttributeError) as e:
+        errors.append(f'{where}: {e}')
+        return None
+
+def parse(config) -> dict:
+    """Validates a parsed conf.json in one pass and returns the settings it changes."""
+    global FG_COLOR, BG_COLOR
+    errors = []
+    if not check_type(errors, 'config', config, dict):
+        raise ConfigError('\n'.join(errors))
+    settings = {}
+    for key, value in config.items():
+        if key not in SETTINGS:
+            print(f'Ignoring unknown config key {key}')
+        elif check_type(errors, key, value, SETTINGS[key][1]) and SETTINGS[key][0] is not None:
+            settings[SETTINGS[key][0]] = value
+    for key in ('steam_library_folders', 'steamapp_exlusions'):
+        if SETTINGS[key][0] in settings and not all(isinstance(v, str) for v in config[key]):
+            errors.append(f'{key}: expected a list of strings')
+    if settings.get('BACKEND', BACKEND) not in BACKENDS:
+        errors.append(f'backend: expected one of {", ".join(BACKENDS)}')
+
+    # Control colors fall back to the configured defaults
+    FG_COLOR = settings.get('FG_COLOR', FG_COLOR)
+    BG_COLOR = settings.get('BG_COLOR', BG_COLOR)
+
+    controls, auto_fill_control = default_controls()
+    if isinstance(config.get('controls'), list):
+        controls = []
+        for i, cd in enumerate(config['controls']):
+            control = parse_control(errors, f'controls[{i}]', cd, f'Control {i + 1}')
+            if control is not None:
+                controls.append(control)
+    if isinstance(config.get('auto_fill_control'), dict):
+        auto_fill_control = parse_control(errors, 'auto_fill_control', config['auto_fill_control'], 'App')
+
+    if errors:
+        raise ConfigError('Invalid config:\n  ' + '\n  '.join(errors))
+
+    if settings.get('AUTO_FILL', AUTO_FILL):
+        controls += [ auto_fill_control ] * settings.get('BUTTON_COUNT', BUTTON_COUNT)
+    settings['CONTROLS'] = controls
+    settings['AUTO_FILL_CONTROL'] = auto_fill_control
+    return settings
+
+def read_cache(stat: os.stat_result, data: Optional[bytes]) -> Optional[dict]:
+    # Anything unexpected in the cache file means the config is parsed again
+    try:
+        with open(CONFIG_CACHE_FILE, 'rb') as file:
+            cache = pickle.load(file)
+        if not isinstance(cache, dict) or not isinstance(cache.get('settings'), dict):
+            return None
+        if cache.get('version') != CONFIG_CACHE_VERSION or cache.get('file') != path.abspath(CONFIG_FILE):
+            return None
+        if cache['stat'] == (stat.st_mtime_ns, stat.st_size):
+            return cache
+        if data is not None and cache['hash'] == hashlib.sha1(data).hexdigest():
+            return cache
+    except Exception:
+        return None
+    return None
+
+def write_cache(stat: os.stat_result, data: bytes, settings: dict):
+    try:
+        with open(CONFIG_CACHE_FILE, 'wb') as file:
+            pickle.dump({
+                'version': CONFIG_CACHE_VERSION,
+                'file': path.abspath(CONFIG_FILE),
+                'stat': (stat.st_mtime_ns, stat.st_size),
+                'hash': hashlib.sha1(data).hexdigest(),
+                'settings': settings
+            }, file, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f'Unable to write config cache: {e}')
+
+def load(create: bool = True):
+    if not path.exists(CONFIG_FILE):
+        if not create:
+            raise ConfigError(f'{CONFIG_FILE} does not exist')
+        print('Creating default config file...')
+        with open(CONFIG_FILE, 'w') as file:
+            json_dump({
+                'monitor': MONITOR,
+                'button_count': BUTTON_COUNT,
+                'auto_close': AUTO_CLOSE,
+                'fg_color': FG_COLOR,
+                'bg_color': BG_COLOR,
+                'auto_fill': AUTO_FILL,
+                'auto_fill_control': AUTO_FILL_CONTROL.to_dict(),
+                'steam_library_folders': STEAM_LIBRARY_FOLDERS,
+                'controls': [
+                    CONTROLS[0].to_dict(),
+                    CONTROLS[1].to_dict()
+                ]
+            }, file, indent=4)
+
+    # The parsed result is cached, keyed by the config file's mtime and size, then its hash
+    stat = os.stat(CONFIG_FILE)
+    cache = read_cache(stat, None)
+    if cache is None:
+        with open(CONFIG_FILE, 'rb') as file:
+            data = file.read()
+        cache = read_cache(stat, data)
+        settings = cache['settings'] if cache is not None else parse(json_loads(data))
+        write_cache(stat, data, settings)
+    else:
+        settings = cache['settings']
+    globals().update(settings)
+
+def comparable(value):
+    if isinstance(value, Control):
+        return value.__getstate__()
+    if isinstance(value, list):
+        return [ comparable(v) for v in value ]
+    return value
+
+def reload() -> List[str]:
+    """Loads the config file again and returns the names of the settings that changed.
+
+    Raises ValueError or OSError and keeps the current settings if the file is invalid or missing, it is never created here.
+    """
+    before = { name: globals()[name] for name in DEFAULTS }
+    # Resident mode and timing can also be turned on from the command line
+    globals().update({ name: value for name, value in DEFAULTS.items() if name not in ('RESIDENT', 'TIMING') })
+    try:
+        load(create=False)
+    except (ValueError, OSError):
+        globals().update(before)
+        raise
+    return [ name for name in DEFAULTS if comparable(globals()[name]) != comparable(before[name]) ]
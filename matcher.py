@@ -0,0 +1,124 @@
+import re
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+def session_name(session) -> str:
+    return session.Process.name()[:-4].lower()
+
+class SteamGameIndex:
+    def __init__(self, games: Iterable[str], lengths: Optional[List[int]] = None):
+        self.games = set(games)
+        # Only prefixes with the length of a known game can match
+        self.lengths = lengths if lengths is not None else sorted({ len(game) for game in self.games })
+
+    @classmethod
+    def from_cache(cls, cache: dict) -> 'SteamGameIndex':
+        return cls(cache['games'], cache['prefix_lengths'])
+
+    def match(self, name: str) -> bool:
+        for length in self.lengths:
+            if length > len(name):
+                break
+            if name[:length] in self.games:
+                return True
+        return False
+
+def classify_targets(target_applications: Iterable[str]) -> tuple:
+    """Sorts target applications into the parts TargetPattern matches with, raises re.error for bad expressions."""
+    match_all = False
+    steam_game = False
+    names = set()
+    substrings = []
+    expressions = []
+    for app in target_applications:
+        if app == '<steamgame>':
+            steam_game = True
+        elif app == '<all>':
+            match_all = True
+        elif app[:2] == 'r`':
+            expressions.append(app[2:])
+        elif app[0] == '~':
+            substrings.append(app[1:])
+        else:
+            names.add(app)
+
+    # Expressions are combined into one alternation unless group numbering would change or inline global flags forbid it
+    compiled = [ re.compile(e, re.IGNORECASE) for e in expressions ]
+    if len(compiled) > 1 and all(c.groups == 0 for c in compiled):
+        combined = '|'.join(f'(?:{e})' for e in expressions)
+        try:
+            re.compile(combined, re.IGNORECASE)
+            expressions = [ combined ]
+        except re.error:
+            pass
+
+    return (match_all, steam_game, frozenset(names), '|'.join(map(re.escape, substrings)), tuple(expressions))
+
+class TargetPattern:
+    def __init__(self, targets: tuple, steam_games: SteamGameIndex):
+        self.match_all, steam_game, self.names, substrings, expressions = targets
+        self.steam_games = steam_games if steam_game else None
+        self.substrings = re.compile(substrings) if substrings else None
+        self.expressions = [ re.compile(e, re.IGNORECASE) for e in expressions ]
+
+    def match(self, name: str) -> bool:
+        if self.match_all or name in self.names:
+            return True
+        if self.substrings is not None and self.substrings.search(name) is not None:
+            return True
+        for expression in self.expressions:
+            if expression.match(name) is not None:
+                return True
+        return self.steam_games is not None and self.steam_games.match(name)
+
+class SessionMatcher:
+    def __init__(self, controls: list, steam_games: Iterable[str], limit: Optional[int] = None):
+        self.steam_games = steam_games if isinstance(steam_games, SteamGameIndex) else SteamGameIndex(steam_games)
+        self.limit = limit
+        # Controls repeat (auto fill), so patterns are compiled once per distinct control
+        patterns = {}
+        self.controls = []
+        for control in controls:
+            if id(control) not in patterns:
+                targets = getattr(control, 'targets', None) or classify_targets(control.target_applications)
+                patterns[id(control)] = TargetPattern(targets, self.steam_games)
+            self.controls.append((control, patterns[id(control)]))
+
+    def match(self, sessions: list, name: Callable[[object], Optional[str]] = None, order: Callable[[list], list] = None, devices=None) -> List[Tuple[object, list]]:
+        """order can rearrange the (session, name) pairs once the first match all (auto fill) control is reached.
+
+        devices resolves control endpoints with find_device and session_device, usually the audio backend.
+        Controls with an endpoint that is not connected are left out.
+        """
+        if name is None:
+            named_sessions = [ (session, session_name(session)) for session in sessions if session.Process ]
+        else:
+            named_sessions = [ (session, n) for session, n in ((session, name(session)) for session in sessions) if n ]
+        claimed = set()
+        matches = []
+        for control, pattern in self.controls:
+            matched_sessions = []
+            if order is not None and pattern.match_all:
+                named_sessions = order(named_sessions)
+                order = None
+            device = None
+            if control.endpoint and devices is not None:
+                device = devices.find_device(control.endpoint, None if control.master else 'render')
+                if device is None:
+                    continue
+            if control.master is False:
+                for session, name in named_sessions:
+                    if name not in claimed and pattern.match(name) and (device is None or devices.session_device(session) == device.id):
+                        if not matched_sessions:
+                            first_name = name
+                        matched_sessions.append(session)
+                        if control.only_first:
+                            break
+                if len(matched_sessions):
+                    claimed.add(first_name)
+
+            if len(matched_sessions) or control.master is True:
+                matches.append((control, matched_sessions))
+                if len(matches) == self.limit:
+                    break
+        return matches
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, List
+import numpy as np
+
+HISTORY = 64 # Samples kept per session in the ring buffer
+CAPACITY = 64 # Most sessions metered at once
+DECAY = 0.8 # Share of the shown level kept per sample once the signal drops
+HOLD = 15 # Samples the peak marker stays up before it decays
+METER_STEPS = 50 # Distinct meter positions, only changes between these are published
+ACTIVITY_HISTORY = 20 # Activity samples kept per session
+ACTIVITY_CAPACITY = 256 # Most sessions sampled for activity at once
+ACTIVITY_INTERVAL = 0.5 # Seconds between activity samples
+ACTIVITY_WINDOW = 5.0 # Seconds after the overlay is shown that activity is sampled, nothing is sampled while hidden
+
+def slot_order(old: List, new: List) -> np.ndarray:
+    # The old slot of every new session, -1 for sessions that are new
+    slots = { id(session): i for i, session in enumerate(old) }
+    return np.array([ slots.get(id(session), -1) for session in new ], dtype=np.int64)
+
+def move_slots(array: np.ndarray, order: np.ndarray, fill):
+    """Moves the columns (last axis) of sessions that stay to their new slots, the rest are set to fill."""
+    kept = order >= 0
+    moved = array[..., order[kept]]
+    array[...] = fill
+    array[..., :len(order)][..., kept] = moved
+
+class PeakSampler:
+    """Polls the peak level of every session on one thread into a preallocated ring buffer.
+
+    Decay and peak hold are computed for all sessions at once, and only levels that visibly
+    changed are passed to publish as {session: (level, hold)}.
+
+    Ranking candidates, shown or not, are sampled into a second ring buffer every activity_interval
+    for the first activity_window seconds after each resume. The thread blocks while paused.
+    """
+
+    def __init__(self, read_peak: Callable[[object], float], publish: Callable[[Dict[Hashable, tuple]], None], interval: float = 0.033, thread_init: Callable[[], None] = lambda: None, activity_interval: float = ACTIVITY_INTERVAL, activity_window: float = ACTIVITY_WINDOW):
+        self.read_peak = read_peak
+        self.publish = publish
+        self.interval = interval
+        self.thread_init = thread_init
+        self.activity_interval = activity_interval
+        self.activity_window = activity_window
+        self.buffer = np.zeros((HISTORY, CAPACITY), dtype=np.float32)
+        self.levels = np.zeros(CAPACITY, dtype=np.float32)
+        self.holds = np.zeros(CAPACITY, dtype=np.float32)
+        self.hold_age = np.zeros(CAPACITY, dtype=np.int32)
+        self.published = np.full(CAPACITY, -1, dtype=np.int32)
+        self.peaks = np.zeros(CAPACITY, dtype=np.float32)
+        self.position = 0
+        self.sessions = []
+        self.activity_buffer = np.zeros((ACTIVITY_HISTORY, ACTIVITY_CAPACITY), dtype=np.float32)
+        self.activity_counts = np.zeros(ACTIVITY_CAPACITY, dtype=np.int32)
+        self.activity_position = 0
+        self.candidates = []
+        self.last_activity = None
+        self.activity_until = 0.0
+        self.samples = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='PeakSampler', daemon=True)
+        self.thread.start()
+
+    def set_sessions(self, sessions: List):
+        with self.lock:
+            if sessions == self.sessions:
+                return
+            # Slots of sessions that stay keep their history
+            order = slot_order(self.sessions, sessions[:CAPACITY])
+            self.sessions = list(sessions[:CAPACITY])
+            for array in (self.levels, self.holds, self.hold_age, self.buffer):
+                move_slots(array, order, 0)
+            move_slots(self.published, order, -1)
+
+    def set_candidates(self, sessions: List):
+        with self.lock:
+            if sessions == self.candidates:
+                return
+            order = slot_order(self.candidates, sessions[:ACTIVITY_CAPACITY])
+            self.candidates = list(sessions[:ACTIVITY_CAPACITY])
+            move_slots(self.activity_buffer, order, 0)
+            move_slots(self.activity_counts, order, 0)
+
+    def resume(self):
+        if not self.running.is_set():
+            self.activity_until = time.monotonic() + self.activity_window
+        self.running.set()
+
+    def pause(self):
+        self.running.clear()
+
+    def sample(self) -> Dict[Hashable, tuple]:
+        with self.lock:
+            n = len(self.sessions)
+            if n == 0:
+                return {}
+            peaks = self.peaks[:n]
+            for i, session in enumerate(self.sessions):
+                try:
+                    peaks[i] = self.read_peak(session)
+                except Exception:
+                    self.errors += 1
+                    peaks[i] = 0
+            self.buffer[self.position, :n] = peaks
+            self.position = (self.position + 1) % HISTORY
+            self.samples += 1
+
+            levels, holds, hold_age = self.levels[:n], self.holds[:n], self.hold_age[:n]
+            np.maximum(peaks, levels * DECAY, out=levels)
+            rising = peaks >= holds
+            hold_age += 1
+            hold_age[rising] = 0
+            holds[rising] = peaks[rising]
+            expired = hold_age > HOLD
+            holds[expired] *= DECAY
+
+            steps = np.rint(levels * METER_STEPS).astype(np.int32) * (METER_STEPS + 1) + np.rint(holds * METER_STEPS).astype(np.int32)
+            changed = np.flatnonzero(steps != self.published[:n])
+            self.published[:n] = steps
+            return { self.sessions[i]: (float(levels[i]), float(holds[i])) for i in changed }
+
+    def sample_activity(self):
+        with self.lock:
+            n = len(self.candidates)
+            row = self.activity_buffer[self.activity_position]
+            for i, session in enumerate(self.candidates):
+                try:
+                    row[i] = self.read_peak(session)
+                except Exception:
+                    self.errors += 1
+                    row[i] = 0
+            self.activity_position = (self.activity_position + 1) % ACTIVITY_HISTORY
+            self.activity_counts[:n] += 1
+            self.last_activity = time.monotonic()
+
+    def activity(self) -> Dict[Hashable, float]:
+        """The mean peak of every candidate over its activity samples, candidates without samples are left out."""
+        with self.lock:
+            n = len(self.candidates)
+            counts = np.minimum(self.activity_counts[:n], ACTIVITY_HISTORY)
+            sums = self.activity_buffer[:, :n].sum(axis=0)
+            return { session: float(sums[i] / counts[i]) for i, session in enumerate(self.candidates) if counts[i] }
+
+    def run(self):
+        self.thread_init()
+        while True:
+            self.running.wait()
+            start = time.monotonic()
+            if self.candidates and start < self.activity_until and (self.last_activity is None or start - self.last_activity >= self.activity_interval):
+                self.sample_activity()
+            changed = self.sample()
+            if changed:
+                self.publish(changed)
+            time.sleep(max(0, self.interval - (time.monotonic() - start)))
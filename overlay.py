@@ -0,0 +1,734 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from PySide6 import QtCore, QtWidgets, QtGui, QtNetwork
+from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt
+import config
+from steamgames import load_steamgames_cache
+from matcher import SessionMatcher, SteamGameIndex
+from titles import TitleResolver
+from audio import DeviceNotFound
+from backends import Backends, create_backends
+from volume import GroupVolume, VolumeWriter
+from processes import ProcessCache
+from usage import UsageHistory, order_by_ranking, rank_names
+from sessions import SessionRegistry
+import render
+import telemetry
+from tracing import TraceRecorder
+from animation import timeline, OUT_BOUNCE, OUT_CURVE
+from ujson import dumps as json_dumps
+
+START_TIME = time.time()
+
+TEXT_OFFSET = 10 # Left edge of the control text, pushed out to FOCUS_OFFSET when focused
+FOCUS_OFFSET = 30
+TEXT_MARGIN = 11
+METER_INSET = 10 # Distance of the peak meter from the sides of a control
+
+steam_games = SteamGameIndex([])
+
+def load_steam_games() -> SteamGameIndex:
+    return SteamGameIndex.from_cache(load_steamgames_cache(
+        config.STEAM_LIBRARY_FOLDERS,
+        config.STEAM_GAME_CACHE_FILE,
+        config.STEAM_GAME_CACHE_TIMEOUT,
+        config.STEAMAPP_EXLUSIONS,
+        config.STEAM_LIBRARY_INDEX_FILE,
+        config.GET_STEAM_GAMES
+    ))
+
+def record_timing(kind: str, start: float):
+    ms = (time.time() - start) * 1000
+    print(f'{kind}: {ms:.1f}ms')
+    with open(config.TIMING_LOG_FILE, 'a') as file:
+        file.write(f'{kind} {ms:.1f}\n')
+
+def record_phase(name: str):
+    # Startup timeline, relative to the start of the process
+    telemetry.record(f'phase:{name}', (time.time() - START_TIME) * 1000)
+    if config.TIMING:
+        record_timing(f'phase:{name}', START_TIME)
+
+def create_session_registry() -> SessionRegistry:
+    audio_backend.thread_init()
+    return SessionRegistry(backends.sessions, config.SESSION_POLL_INTERVAL / 1000)
+
+class StartupLoader(QtCore.QObject):
+    """Runs the slow parts of startup on worker threads and hands the results to the GUI thread."""
+
+    loaded = QtCore.Signal(str, object)
+
+    def start(self):
+        pool = ThreadPoolExecutor(max_workers=2)
+        pool.submit(self.run, 'steam_games', load_steam_games)
+        pool.submit(self.run, 'sessions', create_session_registry)
+        pool.shutdown(wait=False)
+
+    def run(self, name: str, fn):
+        try:
+            result = fn()
+        except Exception as e:
+            print(f'Loading {name} failed: {e}')
+            result = None
+        self.loaded.emit(name, result)
+
+def set_backends(new_backends: Backends):
+    """Builds everything that talks to the backends, also used to replay traces against a fake backend."""
+    global backends, title_resolver, audio_backend, volume_writer, process_cache
+    backends = new_backends
+    telemetry.instrument(backends, trace_recorder.call if trace_recorder is not None else None)
+    title_resolver = TitleResolver(backends.windows)
+    audio_backend = backends.audio
+    volume_writer = VolumeWriter(audio_backend, config.VOLUME_WRITE_INTERVAL / 1000, config.VOLUME_WORKERS)
+    process_cache = ProcessCache(audio_backend)
+
+if config.TELEMETRY:
+    telemetry.enable(config.TELEMETRY)
+trace_recorder = TraceRecorder(config.TRACE_FILE) if config.TRACE_FILE else None
+set_backends(create_backends(config.BACKEND, config.FAKE_SESSION_COUNT, config.FAKE_LATENCY / 1000))
+usage_history = UsageHistory(config.USAGE_HISTORY_FILE, config.USAGE_HALF_LIFE * 3600)
+usage_history.load()
+session_registry = None
+
+class PeakBridge(QtCore.QObject):
+    """Hands peak levels from the sampler thread to the GUI thread."""
+
+    updated = QtCore.Signal(object)
+
+class DeviceBridge(QtCore.QObject):
+    """Hands device topology changes from the notification thread to the GUI thread."""
+
+    changed = QtCore.Signal()
+
+def to_qcolor(value: str, rgba) -> QColor:
+    return QColor(*rgba) if rgba is not None else QColor(value)
+
+def apply_session_levels(levels: dict):
+    volume_writer.apply_all(audio_backend.set_session_volume, levels.items())
+
+class VolumeControlWidget(QtWidgets.QWidget):
+    def __init__(self, i, control: config.Control, sessions: list):
+        super().__init__()
+
+        self.focused = False
+        self.control = control
+        if self.control.master is False:
+            self.sessions = sessions
+        else:
+            self.sessions = []
+        # The text is painted directly, so offsets and text changes never relayout the column
+        self.setFont(QtGui.QFont('Times', 20))
+        self.set_text_color(self.control.fg_color)
+        self.text = control.name
+
+        self.vl = 1
+        self.group = GroupVolume()
+        self.meter = (0.0, 0.0) # Peak level and held peak
+        self.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Minimum)
+        
+        self._bg_opacity = 0
+        self._bg_color = to_qcolor(self.control.bg_color, self.control.bg_rgba)
+        self._bg_color2 = to_qcolor(self.control.bg_color2, self.control.bg2_rgba) if self.control.bg_color2 else None
+        self._x_offset = TEXT_OFFSET
+
+        self.setMinimumWidth(config.MIN_WIDTH)
+
+        self.fade_in(i * 50)
+
+        self.read_volume()
+
+    def sizeHint(self) -> QtCore.QSize:
+        metrics = self.fontMetrics()
+        return QtCore.QSize(TEXT_OFFSET + metrics.horizontalAdvance(self.text) + TEXT_MARGIN, metrics.height() + TEXT_MARGIN * 2)
+
+    def set_text_color(self, color: str):
+        palette = self.palette()
+        palette.setColor(QtGui.QPalette.WindowText, QColor(color))
+        self.setPalette(palette)
+
+    def fade_in(self, delay: int = 0):
+        timeline.animate(self, 'bg_opacity', self.set_bg_opacity, 0.0, 1.0, 100, delay=delay)
+
+    def get_title(self):
+        if len(self.sessions) == 1:
+            process = process_cache.get(self.sessions[0])
+            pname = process.exe_name[:-4].capitalize()
+            if self.control.use_app_title and self.control.use_app_name:
+                title = title_resolver.title(process.pid)
+                if not title:
+                    return pname
+                elif pname in title:
+                    return title
+                else:
+                    return pname + ': ' + title
+            elif self.control.use_app_title:
+                return title_resolver.title(process.pid)
+            elif self.control.use_app_name:
+                if process.display_name:
+                    return process.display_name
+                else:
+                    return pname
+        return self.control.name
+
+    def get_text(self):
+        if config.DEBUG is True and self.focused is True:
+            process = process_cache.get(self.sessions[0]) if not self.control.master else None
+            return f"{self.control.name} {self.vl} \"{(self.control.endpoint or 'Master') if self.control.master else process.display_name or self.get_title()}\" {'master' if self.control.master else process.exe_name} ({len(self.sessions)})"
+        elif config.SHOW_PROCESS_COUNT and self.focused is True and len(self.sessions) > 1:
+            return f"{self.get_title()} - {int(self.vl * 100)}% ({len(self.sessions)})"
+        else:
+            return f"{self.get_title()} - {int(self.vl * 100)}%"
+
+    def update_text(self):
+        # Called where the shown state changes, never while painting. Only a text that no longer fits relayouts the column
+        text = self.get_text()
+        if text == self.text:
+            return
+        self.text = text
+        if self.sizeHint().width() > self.width():
+            self.updateGeometry()
+
+    def paintEvent(self, e):
+        # Backgrounds come pre-rendered from the render cache, only the pixmaps are composited here
+        start = time.perf_counter()
+        render.stats.record('VolumeControlWidget', e.rect())
+        painter = QtGui.QPainter(self)
+        width = max(self.width(), config.MIN_WIDTH)
+        height = self.height()
+        dpr = self.devicePixelRatioF()
+        if self.focused:
+            painter.drawPixmap(0, 0, render.volume_fill(width, height, dpr, config.MAIN_MARGIN, render.volume_step(self.vl)))
+            painter.drawPixmap(-1, 0, render.focus_arrow(height, dpr))
+        else:
+            painter.setOpacity(render.opacity_step(self._bg_opacity) / render.OPACITY_STEPS)
+            painter.drawPixmap(0, 0, render.control_background(width, height, dpr, config.MAIN_MARGIN, self._bg_color, self._bg_color2))
+        if self.meter != (0.0, 0.0):
+            level, hold = self.meter
+            painter.fillRect(QtCore.QRectF(METER_INSET, height - METER_INSET + 3, (width - METER_INSET * 2) * level, 3), render.METER_COLOR)
+            painter.fillRect(QtCore.QRectF(METER_INSET + (width - METER_INSET * 2) * hold - 1, height - METER_INSET + 3, 2, 3), render.METER_COLOR)
+        painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+        painter.drawText(QtCore.QRectF(self._x_offset, 0, width - self._x_offset, height), Qt.AlignLeft | Qt.AlignVCenter, self.text)
+        painter.end()
+        telemetry.record_since('paint:VolumeControlWidget', start)
+
+    def set_control(self, control: config.Control) -> bool:
+        """Swaps in a reloaded control with the same targets, returns True if it looks different."""
+        restyle = control.to_dict() != self.control.to_dict()
+        self.control = control
+        if restyle:
+            self._bg_color = to_qcolor(control.bg_color, control.bg_rgba)
+            self._bg_color2 = to_qcolor(control.bg_color2, control.bg2_rgba) if control.bg_color2 else None
+            self.set_text_color('black' if self.focused else control.fg_color)
+        self.setMinimumWidth(config.MIN_WIDTH)
+        self.update_text()
+        self.update()
+        return restyle
+
+    def set_meter(self, peaks: dict):
+        meter = (0.0, 0.0)
+        for session in self.sessions:
+            level, hold = peaks.get(session, (0.0, 0.0))
+            meter = (max(meter[0], level), max(meter[1], hold))
+        if meter != self.meter:
+            self.meter = meter
+            self.update()
+
+    def set_bg_opacity(self, val: float):
+        changed = render.opacity_step(val) != render.opacity_step(self._bg_opacity)
+        self._bg_opacity = val
+        if changed:
+            self.update()
+
+    def set_x_offset(self, val: float):
+        changed = round(val) != round(self._x_offset)
+        self._x_offset = val
+        if changed:
+            self.update()
+
+    def read_volume(self):
+        if self.control.master is True:
+            try:
+                self.vl = audio_backend.get_master_volume(audio_backend.endpoint_device(self.control.endpoint))
+            except DeviceNotFound:
+                pass # Disconnected, the control is removed when the devices are matched again
+        else:
+            self.group.set_levels(self.read_levels(self.sessions, {}))
+            self.vl = self.group.level
+        # Also picks up window titles resolved again when the overlay is shown
+        self.update_text()
+
+    def read_levels(self, sessions: list, known: dict) -> dict:
+        levels = {}
+        for session in sessions:
+            level = known.get(session)
+            levels[session] = level if level is not None else audio_backend.get_session_volume(session)
+            if self.control.only_first:
+                break
+        return levels
+
+    def set_sessions(self, sessions: list):
+        if self.control.master is True:
+            return
+        self.sessions = sessions
+        self.group.set_levels(self.read_levels(sessions, self.group.levels()))
+        self.vl = self.group.level
+        self.update_text()
+        self.update()
+
+    def change_volume(self, delta: float):
+        # The locally tracked levels are the source of truth, writes are applied by volume_writer
+        # Nothing is written or repainted once the levels are clamped
+        if self.control.master is True:
+            vl = max(0, min(1, self.vl + delta))
+            if vl == self.vl:
+                return
+            try:
+                # Resolved on every step, a missing endpoint must never fall back to the default device
+                device = audio_backend.endpoint_device(self.control.endpoint)
+            except DeviceNotFound:
+                return
+            self.vl = vl
+            volume_writer.submit(self, audio_backend.set_master_volume, self.vl, device, started=telemetry.key_time)
+        else:
+            # The group level is shown, every session moves with it and keeps its relative level
+            levels = self.group.step(delta)
+            if levels is None:
+                return
+            self.vl = self.group.level
+            volume_writer.submit(self, apply_session_levels, levels, started=telemetry.key_time)
+        # Only this control is repainted, Qt recomposes the shade underneath it
+        self.update_text()
+        self.update()
+
+    def focus(self):
+        self.focused = True
+        for session in self.sessions:
+            name = process_cache.name(session)
+            if name:
+                usage_history.record(name)
+        timeline.animate(self, 'x_offset', self.set_x_offset, TEXT_OFFSET, FOCUS_OFFSET, 50, OUT_BOUNCE)
+        self.set_text_color('black')
+        self.update_text()
+        self.update()
+
+    def unfocus(self):
+        self.focused = False
+        timeline.animate(self, 'x_offset', self.set_x_offset, FOCUS_OFFSET, TEXT_OFFSET, 70, OUT_CURVE)
+        self.set_text_color(self.control.fg_color)
+        self.update_text()
+        self.update()
+
+class OverlayWidget(QtWidgets.QWidget):
+    def __init__(self, controls: List[config.Control], sessions: list):
+        super().__init__()
+
+        self.layout = QtWidgets.QVBoxLayout(self)
+        self.layout.setContentsMargins(config.MAIN_MARGIN, config.MAIN_MARGIN, config.MAIN_MARGIN, config.MAIN_MARGIN)
+        self.layout.setSpacing(config.CONTROL_MARGIN)
+
+        self.controls = controls
+        self.matcher = SessionMatcher(controls, steam_games, config.BUTTON_COUNT)
+        self.active_controls = []
+        self.focused_control = None
+        self.timing_mark = None
+        self.peak_sampler = None
+        self.peaks = {}
+        self.ranking = []
+
+        self.populate(sessions)
+
+        # Controls of connected or disconnected endpoints show up or go away right away
+        self.device_bridge = DeviceBridge(self)
+        self.device_bridge.changed.connect(self.devices_changed, Qt.QueuedConnection)
+        audio_backend.device_listeners.append(self.device_bridge.changed.emit)
+
+        self.session_timer = QtCore.QTimer(self)
+        self.session_timer.setInterval(config.SESSION_POLL_INTERVAL)
+        self.session_timer.timeout.connect(self.update_sessions)
+        self.session_timer.start()
+
+        self._gradient_opacity = 0
+        self.fade_in()
+
+    def fade_in(self):
+        timeline.animate(self, 'gradient_opacity', self.set_gradient_opacity, 0.0, 1.0, 120)
+
+    def event(self, e: QtCore.QEvent) -> bool:
+        if e.type() == QtCore.QEvent.LayoutRequest:
+            timeline.layout_passes += 1
+        return super().event(e)
+
+    def populate(self, sessions: list):
+        # Widgets are kept for the same control as long as they still share a session
+        reusable = self.active_controls
+        self.active_controls = []
+        while self.layout.count():
+            self.layout.takeAt(0)
+
+        process_cache.update(sessions)
+        order = (lambda named_sessions: order_by_ranking(named_sessions, self.ranking)) if self.ranking else None
+        for control, matched_sessions in self.matcher.match(sessions, process_cache.name, order, audio_backend):
+            widget = take_widget(reusable, control, matched_sessions)
+            if widget is None:
+                widget = VolumeControlWidget(len(self.layout.children()), control, matched_sessions)
+            else:
+                widget.set_sessions(matched_sessions)
+            self.active_controls.append(widget)
+            self.layout.addWidget(widget)
+
+        if self.focused_control in reusable:
+            self.focused_control = None
+
+        for widget in reusable:
+            timeline.cancel(widget)
+            widget.hide()
+            widget.deleteLater()
+
+        # Fill in the extra space
+        #for _ in range(config.BUTTON_COUNT - len(self.active_controls)):
+        #self.layout.addStretch(0)
+        if config.SPACER_POSITION > 0:
+            self.layout.insertStretch(min(len(self.layout.children()) - 1, config.SPACER_POSITION - 1), 0)
+
+        if trace_recorder is not None:
+            self.record_sessions(sessions)
+
+        if self.peak_sampler is not None:
+            if config.PEAK_METERS:
+                metered = [ session for widget in self.active_controls for session in widget.sessions ]
+                self.peaks = { session: self.peaks[session] for session in metered if session in self.peaks }
+                self.peak_sampler.set_sessions(metered)
+            if config.RANK_AUTO_FILL:
+                self.peak_sampler.set_candidates(sessions)
+
+    def record_sessions(self, sessions: list):
+        levels = {}
+        master = None
+        for widget in self.active_controls:
+            if widget.control.master:
+                master = widget.vl
+            else:
+                levels.update(widget.group.levels())
+        records = [ (process_cache.get(session), levels.get(session)) for session in sessions ]
+        trace_recorder.sessions([ (record.pid, record.exe_name, record.display_name, level) for record, level in records if record is not None ], master)
+
+    def start_meters(self):
+        # Also samples the activity auto fill is ranked by, numpy is only loaded once the window is up
+        try:
+            import meters
+        except ImportError as e:
+            print(f'Peak meters unavailable: {e}')
+            return
+        self.peak_bridge = PeakBridge(self)
+        self.peak_bridge.updated.connect(self.set_peaks)
+        self.peak_sampler = meters.PeakSampler(audio_backend.get_session_peak, self.peak_bridge.updated.emit, config.PEAK_METER_INTERVAL / 1000, audio_backend.thread_init)
+        if config.PEAK_METERS:
+            self.peak_sampler.set_sessions([ session for widget in self.active_controls for session in widget.sessions ])
+        self.peak_sampler.resume()
+
+    def devices_changed(self):
+        self.populate(session_registry.all() if session_registry is not None else [])
+        self.window().fit_to_screen()
+
+    def set_peaks(self, changed: dict):
+        self.peaks.update(changed)
+        for widget in self.active_controls:
+            if any(session in changed for session in widget.sessions):
+                widget.set_meter(self.peaks)
+
+    def rank(self, sessions: list):
+        # Auto fill slots go to the busiest and most used apps, the order is kept until the overlay is opened again
+        if not config.RANK_AUTO_FILL:
+            return
+        process_cache.update(sessions)
+        activity = {}
+        if self.peak_sampler is not None:
+            # Every session is a candidate, not only the shown ones, so a busy app without a slot can rank in
+            self.peak_sampler.set_candidates(sessions)
+            # Only what was sampled after earlier shows, until then usage alone decides and nothing is read here
+            activity = self.peak_sampler.activity()
+        named_sessions = [ (session, process_cache.name(session)) for session in sessions ]
+        self.ranking = rank_names([ pair for pair in named_sessions if pair[1] ], config.BUTTON_COUNT, activity, usage_history)
+
+    def refresh(self, sessions: list):
+        self.rank(sessions)
+        self.populate(sessions)
+        for widget in self.active_controls:
+            widget.read_volume()
+            widget.fade_in(len(self.layout.children()) * 50)
+        self.fade_in()
+        self.session_timer.start()
+        if self.peak_sampler is not None:
+            self.peak_sampler.resume()
+
+    def apply_config(self, controls: List[config.Control]):
+        # Widgets keep their sessions and animations when their control's targets did not change
+        start = time.perf_counter()
+        replacements = {}
+        for control in dict.fromkeys(controls):
+            for old in dict.fromkeys(self.controls):
+                if id(old) not in replacements and control_binding(old) == control_binding(control):
+                    replacements[id(old)] = control
+                    break
+        restyled = sum(widget.set_control(replacements[id(widget.control)]) for widget in self.active_controls if id(widget.control) in replacements)
+        before = list(self.active_controls)
+        self.controls = controls
+        self.matcher = SessionMatcher(controls, steam_games, config.BUTTON_COUNT)
+        self.populate(session_registry.all() if session_registry is not None else [])
+        kept = [ widget for widget in self.active_controls if widget in before ]
+        created = len(self.active_controls) - len(kept)
+        removed = len(before) - len(kept)
+        moved = sum(1 for a, b in zip(kept, [ widget for widget in before if widget in kept ]) if a is not b)
+        print(f'Applied config in {(time.perf_counter() - start) * 1000:.1f}ms: {created} created, {removed} removed, {moved} moved, {restyled} restyled')
+
+    def set_steam_games(self, games: SteamGameIndex):
+        self.matcher = SessionMatcher(self.controls, games, config.BUTTON_COUNT)
+        if session_registry is not None:
+            self.populate(session_registry.all())
+
+    def update_sessions(self):
+        if session_registry is None:
+            return
+        added, removed = session_registry.process()
+        if added or removed:
+            self.populate(session_registry.all())
+
+    def reset(self):
+        if self.focused_control is not None:
+            self.focused_control.unfocus()
+            self.focused_control = None
+        timeline.cancel(self)
+        self._gradient_opacity = 0
+        self.session_timer.stop()
+        if self.peak_sampler is not None:
+            self.peak_sampler.pause()
+
+    def paintEvent(self, e):
+        start = time.perf_counter()
+        render.stats.record('OverlayWidget', e.rect())
+        painter = QtGui.QPainter(self)
+        painter.drawPixmap(self.rect(), render.edge_shade(self.width(), self.devicePixelRatioF(), render.opacity_step(self._gradient_opacity)))
+        painter.end()
+        telemetry.record_since('paint:OverlayWidget', start)
+        if self.timing_mark is not None:
+            record_timing(*self.timing_mark)
+            self.timing_mark = None
+
+    def set_gradient_opacity(self, val: float):
+        changed = render.opacity_step(val) != render.opacity_step(self._gradient_opacity)
+        self._gradient_opacity = val
+        if changed:
+            self.update()
+
+    def keyPressEvent(self, event: QtGui.QKeyEvent):
+        if event.key() == Qt.Key_Up:
+            if self.focused_control is not None:
+                self.focused_control.change_volume(0.01)
+        elif event.key() == Qt.Key_Down:
+            if self.focused_control is not None:
+                self.focused_control.change_volume(-0.01)
+        else:
+            for i, c in enumerate(self.active_controls):
+                if event.text() == str(i + 1):
+                    if self.focused_control is not None:
+                        self.focused_control.unfocus()
+                    if self.focused_control == c:
+                        if config.CLOSE_ON_DESELECT is True:
+                            self.window().dismiss()
+                            return
+                        self.focused_control = None
+                    else:
+                        self.focused_control = c
+                        c.focus()
+                    break
+
+class Overlay(QtWidgets.QMainWindow):
+    def __init__(self, sessions: list, resident: bool = False):
+        super().__init__(flags=Qt.FramelessWindowHint | Qt.NoDropShadowWindowHint | Qt.WindowStaysOnTopHint)
+        self.resident = resident
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        self.setStyleSheet("background:transparent;")
+        self.setCentralWidget(OverlayWidget(config.CONTROLS, sessions))
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setFocus()
+
+        self.config_watcher = None
+        if config.WATCH_CONFIG:
+            self.config_watcher = QtCore.QFileSystemWatcher([ config.CONFIG_FILE ], self)
+            self.config_watcher.fileChanged.connect(self.config_changed)
+            self.config_watcher.directoryChanged.connect(self.config_changed)
+            # Editors often write a file in several steps
+            self.reload_timer = QtCore.QTimer(self, singleShot=True, interval=100)
+            self.reload_timer.timeout.connect(self.reload_config)
+
+    def config_changed(self, path: str):
+        self.reload_timer.start()
+
+    def reload_config(self):
+        # A file replaced on save is no longer watched. While it is missing its directory is watched until it comes back
+        if os.path.exists(config.CONFIG_FILE):
+            if not self.config_watcher.files():
+                self.config_watcher.addPath(config.CONFIG_FILE)
+            if self.config_watcher.directories():
+                self.config_watcher.removePaths(self.config_watcher.directories())
+        elif not self.config_watcher.directories():
+            self.config_watcher.addPath(os.path.dirname(os.path.abspath(config.CONFIG_FILE)))
+        start = time.perf_counter()
+        try:
+            changed = config.reload()
+        except (ValueError, OSError) as e:
+            print(f'Keeping the current config: {e}')
+            return
+        if not changed:
+            return
+        print(f'Reloaded config in {(time.perf_counter() - start) * 1000:.1f}ms, changed: {", ".join(changed)}')
+        self.centralWidget().apply_config(config.CONTROLS)
+        self.fit_to_screen()
+
+    def fit_to_screen(self):
+        # The window covers the control column and the shade next to it, not the whole monitor
+        screens = QtGui.QScreen.virtualSiblings(self.screen())
+        monitor = screens[min(config.MONITOR, len(screens) - 1)].availableGeometry()
+        width = min(monitor.width(), self.centralWidget().sizeHint().width() + config.SHADE_WIDTH)
+        self.setGeometry(monitor.left(), monitor.top(), width, monitor.height())
+
+    def summon(self, requested_at: float = None):
+        if self.isVisible():
+            self.activateWindow()
+            return
+        if config.TIMING:
+            self.centralWidget().timing_mark = ('warm', requested_at or time.time())
+        title_resolver.invalidate()
+        audio_backend.refresh()
+        if session_registry is not None:
+            session_registry.sync()
+            self.centralWidget().refresh(session_registry.all())
+        if trace_recorder is not None:
+            trace_recorder.show()
+        self.fit_to_screen()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.setFocus()
+
+    def startup_loaded(self, name: str, result):
+        global steam_games, session_registry
+        record_phase(name)
+        if result is None:
+            return
+        if name == 'steam_games':
+            steam_games = result
+            self.centralWidget().set_steam_games(steam_games)
+        elif name == 'sessions':
+            session_registry = result
+            self.centralWidget().rank(session_registry.all())
+            self.centralWidget().populate(session_registry.all())
+        self.fit_to_screen()
+        record_phase(f'{name}_shown')
+
+    def dismiss(self):
+        volume_writer.flush()
+        usage_history.save()
+        if self.resident is False:
+            sys.exit()
+        if self.isVisible():
+            if trace_recorder is not None:
+                trace_recorder.hide()
+            self.hide()
+            self.centralWidget().reset()
+
+    def keyPressEvent(self, event: QtGui.QKeyEvent):
+        if telemetry.enabled:
+            telemetry.key_time = time.perf_counter()
+        if trace_recorder is not None:
+            trace_recorder.key(event.key(), event.text())
+        if event.key() == Qt.Key_Escape:
+            self.dismiss()
+            return
+        self.centralWidget().keyPressEvent(event)
+
+    def focusOutEvent(self, event: QtGui.QFocusEvent):
+        self.dismiss()
+
+class OverlayServer(QtNetwork.QLocalServer):
+    """Listens for commands from later invocations while running resident."""
+
+    def __init__(self, overlay: Overlay):
+        super().__init__(overlay)
+        self.overlay = overlay
+        self.newConnection.connect(self.accept_connection)
+
+    def accept_connection(self):
+        while self.hasPendingConnections():
+            socket = self.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self.read_commands(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def read_commands(self, socket: QtNetwork.QLocalSocket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).decode(errors='replace')
+            words = line.split()
+            if not words:
+                continue
+            command, args = words[0], words[1:]
+            if command == 'show':
+                try:
+                    requested_at = float(args[0]) if args else None
+                except ValueError:
+                    requested_at = None
+                self.overlay.summon(requested_at)
+            elif command == 'hide':
+                self.overlay.dismiss()
+            elif command == 'quit':
+                QtWidgets.QApplication.quit()
+            elif command == 'stats':
+                socket.write((json_dumps(dict(render.stats.to_dict(), animation=timeline.stats(), telemetry=telemetry.stats(), processes=process_cache.stats())) + '\n').encode())
+            else:
+                print(f'Ignoring unknown command {line.strip()!r}')
+
+def control_binding(control: config.Control) -> tuple:
+    return (control.target_applications, control.master, control.endpoint, control.exclude, control.only_first)
+
+def take_widget(widgets: list, control: config.Control, sessions: list):
+    for i, widget in enumerate(widgets):
+        if widget.control is control and (control.master or any(session in sessions for session in widget.sessions)):
+            return widgets.pop(i)
+    return None
+
+def changedFocusSlot(old, now):
+    if (now == None and QtWidgets.QApplication.activeWindow() != None):
+        QtWidgets.QApplication.activeWindow().setFocus()
+
+def run(start_time: float):
+    global START_TIME
+    START_TIME = start_time
+
+    app = QtWidgets.QApplication([])
+    QtCore.QObject.connect(app, QtCore.SIGNAL("focusChanged(QWidget *, QWidget *)"), changedFocusSlot)
+    record_phase('application')
+
+    # Master and fixed controls show right away, sessions and steam games stream in once loaded
+    overlay = Overlay([], config.RESIDENT)
+    if config.TIMING:
+        overlay.centralWidget().timing_mark = ('cold', START_TIME)
+    loader = StartupLoader(overlay)
+    loader.loaded.connect(overlay.startup_loaded)
+    loader.start()
+
+    if config.RESIDENT:
+        app.setQuitOnLastWindowClosed(False)
+        QtNetwork.QLocalServer.removeServer(config.SERVER_NAME)
+        server = OverlayServer(overlay)
+        if not server.listen(config.SERVER_NAME):
+            print(f'Unable to listen on {config.SERVER_NAME}: {server.errorString()}')
+
+    overlay.fit_to_screen()
+    overlay.show()
+    if config.PEAK_METERS or config.RANK_AUTO_FILL:
+        overlay.centralWidget().start_meters()
+
+    app.exec()
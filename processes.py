@@ -0,0 +1,78 @@
+import time
+from typing import Iterable, Optional
+import telemetry
+
+
+class ProcessInfo:
+    __slots__ = ('pid', 'create_time', 'name', 'exe_name', 'exe', 'display_name')
+
+    def __init__(self, pid: int, create_time: float, exe_name: str, exe: str, display_name: str):
+        self.pid = pid
+        self.create_time = create_time
+        self.name = exe_name[:-4].lower() # Normalized name the matcher compares against
+        self.exe_name = exe_name
+        self.exe = exe
+        self.display_name = display_name
+
+class ProcessCache:
+    """Process metadata of the audio sessions, keyed by (pid, create time) so reused pids are never confused."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+        self.snapshots = 0
+        self.evictions = 0
+
+    def update(self, sessions: Iterable):
+        """Loads every unknown process with one snapshot and evicts the processes that exited."""
+        keys = {}
+        for session in sessions:
+            key = self.backend.process_key(session)
+            if key is not None:
+                keys[key] = session
+        missing = { key[0]: session for key, session in keys.items() if key not in self.records }
+        if missing:
+            start = time.perf_counter()
+            self.snapshots += 1
+            snapshot = self.backend.process_snapshot(list(missing))
+            telemetry.record_since('ProcessSnapshot', start)
+            for pid, session in missing.items():
+                self.load(session, snapshot.get(pid))
+        for key in [ key for key in self.records if key not in keys ]:
+            del self.records[key]
+            self.evictions += 1
+
+    def load(self, session, info: Optional[tuple]) -> Optional[ProcessInfo]:
+        key = self.backend.process_key(session)
+        if key is None:
+            return None
+        if info is None:
+            # Not in the snapshot, the session's own process handle still knows its name
+            info = (self.backend.process_name(session) or '', '')
+        record = self.records[key] = ProcessInfo(key[0], key[1], info[0], info[1], session.DisplayName or '')
+        return record
+
+    def get(self, session) -> Optional[ProcessInfo]:
+        record = self.records.get(self.backend.process_key(session))
+        if record is None:
+            self.misses += 1
+            return self.load(session, None)
+        self.hits += 1
+        return record
+
+    def name(self, session) -> Optional[str]:
+        record = self.get(session)
+        return record.name if record is not None else None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'processes': len(self.records),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'snapshots': self.snapshots,
+            'evictions': self.evictions
+        }
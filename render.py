@@ -0,0 +1,128 @@
+import math
+from collections import Counter, OrderedDict
+from typing import Callable, Hashable, Optional
+from PySide6 import QtCore, QtGui
+from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt, QPointF
+
+OPACITY_STEPS = 32 # Fades are drawn in this many distinct opacity steps
+VOLUME_STEPS = 100 # Distinct volume fill positions
+
+FILL_COLOR = QColor('#6cfc05')
+FILL_HIGHLIGHT_COLOR = QColor('#f9f9f7')
+ARROW_COLOR = QColor('black')
+METER_COLOR = QColor(0, 0, 0, 110)
+
+class PixmapCache:
+    def __init__(self, limit: int = 512):
+        self.limit = limit
+        self.pixmaps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, render: Callable[[], QtGui.QPixmap]) -> QtGui.QPixmap:
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            self.misses += 1
+            pixmap = self.pixmaps[key] = render()
+            if len(self.pixmaps) > self.limit:
+                self.pixmaps.popitem(last=False)
+        else:
+            self.hits += 1
+            self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def clear(self):
+        self.pixmaps.clear()
+
+class PaintStats:
+    """Counts paint events and the area they covered, per widget class."""
+
+    def __init__(self):
+        self.paints = Counter()
+        self.area = Counter()
+
+    def record(self, name: str, rect: QtCore.QRect):
+        self.paints[name] += 1
+        self.area[name] += rect.width() * rect.height()
+
+    def reset(self):
+        self.paints.clear()
+        self.area.clear()
+
+    def to_dict(self) -> dict:
+        return { 'paints': dict(self.paints), 'area': dict(self.area), 'cache_hits': cache.hits, 'cache_misses': cache.misses }
+
+cache = PixmapCache()
+stats = PaintStats()
+
+def opacity_step(opacity: float) -> int:
+    return round(max(0, min(1, opacity)) * OPACITY_STEPS)
+
+def volume_step(level: float) -> int:
+    return round(max(0, min(1, level)) * VOLUME_STEPS)
+
+def new_pixmap(width: int, height: int, dpr: float) -> QtGui.QPixmap:
+    pixmap = QtGui.QPixmap(math.ceil(width * dpr), math.ceil(height * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.transparent)
+    return pixmap
+
+def draw_rounded(pixmap: QtGui.QPixmap, width: int, height: int, brush):
+    painter = QtGui.QPainter(pixmap)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setBrush(brush)
+    painter.setPen(Qt.NoPen)
+    painter.drawRoundedRect(QtCore.QRect(0, 0, width, height), 10, 10, Qt.AbsoluteSize)
+    painter.end()
+
+def control_background(width: int, height: int, dpr: float, margin: int, color: QColor, color2: Optional[QColor]) -> QtGui.QPixmap:
+    def render():
+        pixmap = new_pixmap(width, height, dpr)
+        if color2 is not None:
+            gradient = QtGui.QLinearGradient(0, -height * 2, margin + width, height * 4)
+            gradient.setColorAt(0.30, color)
+            gradient.setColorAt(0.60, color2)
+            draw_rounded(pixmap, width, height, gradient)
+        else:
+            draw_rounded(pixmap, width, height, color)
+        return pixmap
+    return cache.get(('background', width, height, dpr, margin, color.rgba(), color2.rgba() if color2 is not None else None), render)
+
+def volume_fill(width: int, height: int, dpr: float, margin: int, step: int) -> QtGui.QPixmap:
+    def render():
+        pixmap = new_pixmap(width, height, dpr)
+        gradient = QtGui.QLinearGradient(0, 0, margin + width, 0)
+        gradient.setColorAt(0, FILL_COLOR)
+        gradient.setColorAt(min(0.99, step / VOLUME_STEPS), FILL_HIGHLIGHT_COLOR)
+        gradient.setColorAt(1, FILL_COLOR)
+        draw_rounded(pixmap, width, height, gradient)
+        return pixmap
+    return cache.get(('volume', width, height, dpr, margin, step), render)
+
+def focus_arrow(height: int, dpr: float) -> QtGui.QPixmap:
+    # Drawn one pixel left of the control, like the arrow it replaces
+    def render():
+        width = math.ceil((height - 20) / 2) + 1
+        pixmap = new_pixmap(width, height, dpr)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setBrush(ARROW_COLOR)
+        painter.setPen(Qt.NoPen)
+        painter.drawPolygon([ QPointF(0, 10), QPointF((height - 20) / 2 + 1, height / 2), QPointF(0, height - 10) ], Qt.FillRule.WindingFill)
+        painter.end()
+        return pixmap
+    return cache.get(('arrow', height, dpr), render)
+
+def edge_shade(width: int, dpr: float, step: int) -> QtGui.QPixmap:
+    # The shade only changes horizontally, so a single row is stretched over the full height
+    def render():
+        pixmap = new_pixmap(width, 1, dpr)
+        gradient = QtGui.QLinearGradient(0, 0, width, 0)
+        gradient.setColorAt(0, QColor(0, 0, 0, round(step / OPACITY_STEPS * 255)))
+        gradient.setColorAt(1, QColor('transparent'))
+        painter = QtGui.QPainter(pixmap)
+        painter.fillRect(QtCore.QRect(0, 0, width, 1), gradient)
+        painter.end()
+        return pixmap
+    return cache.get(('shade', width, dpr, step), render)
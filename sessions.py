@@ -0,0 +1,186 @@
+import queue
+import time
+from typing import Callable, Hashable, List, Tuple
+
+
+class SessionSource:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def snapshot(self) -> list:
+        return self.backend.get_all_sessions()
+
+    def session_id(self, session) -> Hashable:
+        return session.InstanceIdentifier
+
+    def subscribe(self, created: Callable[[object], None]) -> bool:
+        """Calls created with every new session, from any thread. Returns False if notifications are unavailable."""
+        return False
+
+    def watch(self, session, expired: Callable[[Hashable], None]):
+        pass
+
+    def unwatch(self, session):
+        pass
+
+class WindowsSessionSource(SessionSource):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.watchers = {}
+        self.managers = [] # (session manager, notification) per render device
+        try:
+            from comtypes import COMObject
+            from pycaw.api.audiopolicy import IAudioSessionEvents, IAudioSessionNotification
+        except ImportError:
+            self.available = False
+            return
+        self.available = True
+
+        class SessionNotification(COMObject):
+            _com_interfaces_ = [ IAudioSessionNotification ]
+
+            def __init__(self, callback):
+                super().__init__()
+                self.callback = callback
+
+            def OnSessionCreated(self, new_session):
+                # The pointer is only borrowed for the duration of the call
+                new_session.AddRef()
+                self.callback(new_session)
+
+        class SessionEvents(COMObject):
+            _com_interfaces_ = [ IAudioSessionEvents ]
+
+            def __init__(self, callback):
+                super().__init__()
+                self.callback = callback
+
+            def OnStateChanged(self, new_state):
+                if new_state == 2: # AudioSessionStateExpired
+                    self.callback()
+
+            def OnSessionDisconnected(self, disconnect_reason):
+                self.callback()
+
+        self.SessionNotification = SessionNotification
+        self.SessionEvents = SessionEvents
+
+    def subscribe(self, created: Callable[[object], None]) -> bool:
+        if not self.available:
+            return False
+        # Every render device has its own session manager, new sessions are tagged with their device
+        for device in self.backend.devices():
+            if device.flow != 'render':
+                continue
+            manager = self.backend.session_manager(device.id)
+            # Notifications are only delivered once the session list has been enumerated
+            manager.GetSessionEnumerator()
+            notification = self.SessionNotification(lambda control, device_id=device.id: created(self.backend.create_session(control, device_id)))
+            manager.RegisterSessionNotification(notification)
+            self.managers.append((manager, notification))
+        return True
+
+    def watch(self, session, expired: Callable[[Hashable], None]):
+        if not self.available:
+            return
+        session_id = self.session_id(session)
+        events = self.SessionEvents(lambda: expired(session_id))
+        session._ctl.RegisterAudioSessionNotification(events)
+        self.watchers[session_id] = (session, events)
+
+    def unwatch(self, session):
+        watcher = self.watchers.pop(self.session_id(session), None)
+        if watcher is not None:
+            session._ctl.UnregisterAudioSessionNotification(watcher[1])
+
+class FakeSessionSource(SessionSource):
+    def __init__(self, backend, notifications: bool = True):
+        super().__init__(backend)
+        self.notifications = notifications
+        self.created = None
+        self.watchers = {}
+        self.snapshots = 0
+
+    def snapshot(self) -> list:
+        self.snapshots += 1
+        return super().snapshot()
+
+    def subscribe(self, created: Callable[[object], None]) -> bool:
+        if self.notifications:
+            self.created = created
+        return self.notifications
+
+    def watch(self, session, expired: Callable[[Hashable], None]):
+        self.watchers[self.session_id(session)] = expired
+
+    def unwatch(self, session):
+        self.watchers.pop(self.session_id(session), None)
+
+    def start(self, session):
+        self.backend.add_session(session)
+        if self.created is not None:
+            self.created(session)
+
+    def stop(self, session):
+        self.backend.sessions.remove(session)
+        expired = self.watchers.get(self.session_id(session))
+        if self.notifications and expired is not None:
+            expired(self.session_id(session))
+
+class SessionRegistry:
+    """The current audio sessions, kept up to date from notifications or by polling."""
+
+    def __init__(self, source: SessionSource, poll_interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.source = source
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sessions = {}
+        self.events = queue.SimpleQueue()
+        self.notifying = source.subscribe(lambda session: self.events.put(('created', session)))
+        self.last_sync = None
+        self.sync()
+
+    def expired(self, session_id: Hashable):
+        self.events.put(('expired', session_id))
+
+    def all(self) -> list:
+        return list(self.sessions.values())
+
+    def add(self, session) -> bool:
+        session_id = self.source.session_id(session)
+        if session_id in self.sessions:
+            return False
+        self.sessions[session_id] = session
+        if self.notifying:
+            self.source.watch(session, self.expired)
+        return True
+
+    def remove(self, session_id: Hashable):
+        session = self.sessions.pop(session_id, None)
+        if session is not None and self.notifying:
+            self.source.unwatch(session)
+        return session
+
+    def sync(self) -> Tuple[List, List]:
+        """Diffs a fresh snapshot against the known sessions."""
+        self.last_sync = self.clock()
+        snapshot = { self.source.session_id(session): session for session in self.source.snapshot() }
+        removed = [ self.remove(session_id) for session_id in list(self.sessions) if session_id not in snapshot ]
+        added = [ session for session in snapshot.values() if self.add(session) ]
+        return added, removed
+
+    def process(self) -> Tuple[List, List]:
+        added, removed = [], []
+        while not self.events.empty():
+            kind, value = self.events.get()
+            if kind == 'created' and self.add(value):
+                added.append(value)
+            elif kind == 'expired':
+                session = self.remove(value)
+                if session is not None:
+                    removed.append(session)
+        if not self.notifying and self.clock() - self.last_sync >= self.poll_interval:
+            polled_added, polled_removed = self.sync()
+            added += polled_added
+            removed += polled_removed
+        return added, removed
@@ -1,7 +1,10 @@
 import datetime
+import hashlib
 import os
 import re
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Pattern
+from ujson import load as json_load, dump as json_dump
 
 
 STEAMAPP_EXLUSIONS = [
@@ -92,40 +95,166 @@ STEAMAPP_EXLUSIONS = [
     'steamwebhelper'
 ]
 
-def re_check_list(s: str, expr_list: List[str]):
-    for expr in expr_list:
-        if re.match(expr, s, re.IGNORECASE) is not None:
-            return True
-    return False
+CACHE_VERSION = 1
+MAX_DEPTH = 1 # Deepest sub directory of a game directory searched for executables
 
-def find_steam_games(path: str, additional_exlusions: List[str]) -> List[str]:
-    l = []
-    p = os.path.join(path, 'steamapps', 'common')
-    for root, _, files in os.walk(p):
-        if root[len(p):].count(os.sep) < 3:
-            for file in files:
-                if file.endswith('.exe'):
-                    file = file[:-4]
-                    if not re_check_list(file, STEAMAPP_EXLUSIONS + additional_exlusions):
-                        if file not in l:
-                            l.append(file.lower())
-    return l
-
-def find_and_write_steamgames_cache(library_folders: List[str], file_name: str, additional_exlusions: List[str]):
-    steam_games = []
+def compile_exclusions(additional_exlusions: List[str]) -> Pattern:
+    return re.compile('|'.join(f'(?:{expr})' for expr in STEAMAPP_EXLUSIONS + additional_exlusions), re.IGNORECASE)
+
+def read_vdf_values(file_name: str, key: str) -> List[str]:
+    try:
+        with open(file_name, 'r', encoding='utf-8', errors='replace') as file:
+            s = file.read()
+    except OSError:
+        return []
+    return [ value.replace('\\\\', '\\').replace('\\"', '"') for value in re.findall(r'"%s"\s+"((?:[^"\\]|\\.)*)"' % key, s, re.IGNORECASE) ]
+
+def find_library_folders(library_folders: List[str]) -> List[str]:
+    folders = {}
     for folder in library_folders:
-        steam_games.extend(find_steam_games(folder, additional_exlusions))
+        folders.setdefault(os.path.normcase(os.path.normpath(folder)), folder)
+        for extra in read_vdf_values(os.path.join(folder, 'steamapps', 'libraryfolders.vdf'), 'path'):
+            folders.setdefault(os.path.normcase(os.path.normpath(extra)), extra)
+    return list(folders.values())
+
+def find_game_directories(path: str) -> List[str]:
+    steamapps = os.path.join(path, 'steamapps')
+    common = os.path.join(steamapps, 'common')
+    # App manifests name the installed game directories, so stray folders are never walked
+    try:
+        manifests = [ entry.path for entry in os.scandir(steamapps) if entry.name.startswith('appmanifest_') and entry.name.endswith('.acf') ]
+    except OSError:
+        return []
+    if manifests:
+        dirs = []
+        for manifest in manifests:
+            for installdir in read_vdf_values(manifest, 'installdir'):
+                if os.path.isdir(os.path.join(common, installdir)):
+                    dirs.append(os.path.join(common, installdir))
+        return dirs
+    try:
+        return [ entry.path for entry in os.scandir(common) if entry.is_dir() ]
+    except OSError:
+        return []
+
+def scan_game_directory(path: str) -> dict:
+    dirs = {}
+    exes = []
+    for root, subdirs, files in os.walk(path):
+        try:
+            dirs[root] = os.stat(root).st_mtime_ns
+        except OSError:
+            continue
+        if root[len(path):].count(os.sep) >= MAX_DEPTH:
+            subdirs.clear()
+        for file in files:
+            if file.lower().endswith('.exe'):
+                exes.append(file[:-4])
+    return { 'dirs': dirs, 'exes': exes }
+
+def index_entry_valid(entry: dict) -> bool:
+    try:
+        return all(os.stat(d).st_mtime_ns == mtime for d, mtime in entry['dirs'].items())
+    except OSError:
+        return False
+
+def read_library_index(file_name: str) -> dict:
+    try:
+        with open(file_name, 'r') as file:
+            return json_load(file)
+    except (OSError, ValueError):
+        return {}
+
+def write_library_index(file_name: str, index: dict):
     with open(file_name, 'w') as file:
-        dt = datetime.datetime.now().isoformat()
-        file.write(dt + '\n' + '\n'.join(steam_games))
-    return steam_games
-
-def read_steamgames_cache(file_name: str, cache_expiration: int) -> Optional[List[str]]:
-    with open(file_name, 'r') as file:
-        s = file.read()
-        steam_games = [ _s.lower() for _s in s.split('\n') if len(_s) > 1 ]
-        dt = datetime.datetime.fromisoformat(steam_games[0])
-        delta = datetime.datetime.now() - dt
-        if delta.seconds > cache_expiration * 60:
+        json_dump(index, file)
+
+def scan_library_folders(library_folders: List[str], index: dict) -> dict:
+    with ThreadPoolExecutor() as pool:
+        game_dirs = [ d for dirs in pool.map(find_game_directories, find_library_folders(library_folders)) for d in dirs ]
+
+        def scan(game_dir):
+            entry = index.get(game_dir)
+            if entry is not None and index_entry_valid(entry):
+                return entry
+            return scan_game_directory(game_dir)
+
+        return dict(zip(game_dirs, pool.map(scan, game_dirs)))
+
+def collect_steam_games(index: dict, additional_exlusions: List[str]) -> List[str]:
+    exclusions = compile_exclusions(additional_exlusions)
+    games = {}
+    for entry in index.values():
+        for exe in entry['exes']:
+            if exclusions.match(exe) is None:
+                games.setdefault(exe.lower(), None)
+    return list(games)
+
+def find_steam_games(path: str, additional_exlusions: List[str]) -> List[str]:
+    return collect_steam_games(scan_library_folders([ path ], {}), additional_exlusions)
+
+def exclusions_hash(additional_exlusions: List[str]) -> str:
+    return hashlib.sha1('\n'.join(STEAMAPP_EXLUSIONS + additional_exlusions).encode()).hexdigest()
+
+def library_state(library_folders: List[str]) -> dict:
+    # Installing or removing a game or library touches one of these
+    state = {}
+    for folder in find_library_folders(library_folders):
+        steamapps = os.path.join(folder, 'steamapps')
+        for p in (steamapps, os.path.join(steamapps, 'common'), os.path.join(steamapps, 'libraryfolders.vdf')):
+            try:
+                state[p] = os.stat(p).st_mtime_ns
+            except OSError:
+                state[p] = None
+    return state
+
+def find_and_write_steamgames_cache(library_folders: List[str], file_name: str, additional_exlusions: List[str], index_file: Optional[str] = None) -> dict:
+    index = scan_library_folders(library_folders, read_library_index(index_file) if index_file else {})
+    if index_file:
+        write_library_index(index_file, index)
+    steam_games = collect_steam_games(index, additional_exlusions)
+    cache = {
+        'version': CACHE_VERSION,
+        'created': datetime.datetime.now().isoformat(),
+        'library_folders': library_folders,
+        'libraries': library_state(library_folders),
+        'exclusions': exclusions_hash(additional_exlusions),
+        'games': steam_games,
+        'prefix_lengths': sorted({ len(game) for game in steam_games })
+    }
+    with open(file_name, 'w') as file:
+        json_dump(cache, file)
+    return cache
+
+def read_steamgames_cache(file_name: str, cache_expiration: int, library_folders: List[str], additional_exlusions: List[str]) -> Optional[dict]:
+    try:
+        with open(file_name, 'r') as file:
+            cache = json_load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return None
+    # A damaged or hand edited cache is rebuilt like an outdated one
+    try:
+        delta = datetime.datetime.now() - datetime.datetime.fromisoformat(cache['created'])
+        if delta.total_seconds() > cache_expiration * 60:
+            return None
+        if cache['library_folders'] != library_folders or cache['exclusions'] != exclusions_hash(additional_exlusions):
+            return None
+        if cache['libraries'] != library_state(library_folders):
             return None
-        return steam_games[1:]
\ No newline at end of file
+        if not isinstance(cache['games'], list) or not isinstance(cache['prefix_lengths'], list):
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return cache
+
+def load_steamgames_cache(library_folders: List[str], file_name: str, cache_expiration: int, additional_exlusions: List[str], index_file: Optional[str] = None, force: bool = False) -> dict:
+    cache = None
+    if os.path.exists(file_name) and force is False:
+        cache = read_steamgames_cache(file_name, cache_expiration, library_folders, additional_exlusions)
+        if cache is None:
+            print('Steam game cache out of date')
+    if cache is None:
+        cache = find_and_write_steamgames_cache(library_folders, file_name, additional_exlusions, index_file)
+    return cache
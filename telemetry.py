@@ -0,0 +1,170 @@
+import math
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Optional
+from ujson import dumps as json_dumps, loads as json_loads
+
+BUCKET_BASE = 0.01 # Upper bound of the first histogram bucket in milliseconds, each next bucket doubles
+
+enabled = False
+key_time = None # When the last key press reached the overlay, in perf_counter seconds
+nesting = threading.local() # Time spent in timed calls made from inside the current timed call
+
+class Histogram:
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.buckets[max(0, math.ceil(math.log2(max(ms, BUCKET_BASE) / BUCKET_BASE)))] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0,
+            'max_ms': self.max,
+            'buckets': { f'<={BUCKET_BASE * 2 ** i:g}': n for i, n in sorted(self.buckets.items()) }
+        }
+
+class Recorder:
+    """Keeps a latency histogram per metric and writes every sample as a JSON line to a file or a UDP socket."""
+
+    def __init__(self, target: str):
+        self.histograms = defaultdict(Histogram)
+        self.lock = threading.Lock()
+        self.file = None
+        self.socket = None
+        if target.startswith('udp://'):
+            host, port = target[6:].rsplit(':', 1)
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.address = (host, int(port))
+        else:
+            self.file = open(target, 'a', buffering=1)
+
+    def record(self, name: str, ms: float):
+        line = json_dumps({ 'name': name, 'ms': round(ms, 4), 't': time.time() })
+        with self.lock:
+            self.histograms[name].add(ms)
+            try:
+                if self.socket is not None:
+                    self.socket.sendto(line.encode(), self.address)
+                else:
+                    self.file.write(line + '\n')
+            except OSError:
+                pass
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return { name: histogram.to_dict() for name, histogram in self.histograms.items() }
+
+recorder = None
+
+def enable(target: str):
+    global enabled, recorder
+    try:
+        recorder = Recorder(target)
+    except (OSError, ValueError) as e:
+        print(f'Unable to open telemetry target {target}: {e}')
+        return
+    enabled = True
+
+def record(name: str, ms: float):
+    if enabled:
+        recorder.record(name, ms)
+
+def record_since(name: str, start: float):
+    """Records the time since start, a perf_counter value."""
+    if enabled:
+        recorder.record(name, (time.perf_counter() - start) * 1000)
+
+def stats() -> dict:
+    return recorder.to_dict() if enabled else {}
+
+def timed(name: Optional[str], fn: Callable, name_arg: Optional[int] = None, record: Callable[[str, float], None] = None) -> Callable:
+    """Records the time spent in fn minus the time of timed calls nested in it, like an interface activated inside call_endpoint.
+
+    Every sample counts once, so the samples of a call add up to its real duration and replays do not charge them twice.
+    """
+    # Metrics named after a call argument, like the method name passed to call_session
+    record = record or recorder.record
+    def wrapper(*args, **kwargs):
+        outer = getattr(nesting, 'time', 0.0)
+        nesting.time = 0.0
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record(name or args[name_arg], (elapsed - nesting.time) * 1000)
+            nesting.time = outer + elapsed
+    return wrapper
+
+def instrument(backends, record: Callable[[str, float], None] = None):
+    """Wraps the backend calls in timers. Only done when enabled or given a record function, so disabled telemetry costs nothing.
+
+    Called once per backend, stacked wrappers would each subtract the time of the one inside. With telemetry enabled record gets every sample too.
+    """
+    if not enabled and record is None:
+        return
+    if enabled and record is not None:
+        extra = record
+        def record(name: str, ms: float):
+            recorder.record(name, ms)
+            extra(name, ms)
+    audio = backends.audio
+    audio.call_endpoint = timed(None, audio.call_endpoint, 0, record)
+    audio.call_session = timed(None, audio.call_session, 1, record)
+    audio.activate_endpoint = timed('ActivateEndpoint', audio.activate_endpoint, record=record)
+    audio.get_all_sessions = timed('GetAllSessions', audio.get_all_sessions, record=record)
+    audio.enumerate_devices = timed('EnumAudioEndpoints', audio.enumerate_devices, record=record)
+    audio.process_name = timed('Process.name', audio.process_name, record=record)
+    windows = backends.windows
+    windows.windows = timed('EnumWindows', windows.windows, record=record)
+    windows.title = timed('GetWindowText', windows.title, record=record)
+
+def percentile(values: list, p: float) -> float:
+    # Nearest rank on sorted values
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize(file_name: str) -> dict:
+    samples = defaultdict(list)
+    with open(file_name) as file:
+        for line in file:
+            try:
+                sample = json_loads(line)
+                samples[sample['name']].append(float(sample['ms']))
+            except (ValueError, KeyError, TypeError):
+                continue
+    summary = {}
+    for name, values in samples.items():
+        values.sort()
+        summary[name] = {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'max': values[-1]
+        }
+    return summary
+
+def print_summary(summary: dict):
+    print(f'{"metric":<30} {"count":>8} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} {"max ms":>10}')
+    for name, s in sorted(summary.items()):
+        print(f'{name:<30} {s["count"]:>8} {s["p50"]:>10.3f} {s["p95"]:>10.3f} {s["p99"]:>10.3f} {s["max"]:>10.3f}')
+
+def main():
+    if len(sys.argv) != 2:
+        print('Usage: telemetry.py <metrics file>')
+        sys.exit(1)
+    print_summary(summarize(sys.argv[1]))
+
+if __name__ == "__main__":
+    main()
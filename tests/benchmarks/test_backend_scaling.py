@@ -0,0 +1,83 @@
+import pytest
+from conftest import SESSION_COUNTS
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+from audio import FAKE_DEVICES, FakeAudioBackend
+from matcher import SessionMatcher, SteamGameIndex
+from processes import ProcessCache
+from titles import FakeWindowBackend, TitleResolver
+from volume import GroupVolume, VolumeWriter
+
+GAMES = SteamGameIndex([ 'vlc', 'obs', 'foobar' ])
+
+def scaling_controls() -> list:
+    auto_fill = config.Control('App', [ '<all>' ], False, True, True)
+    return [
+        config.Control('Master', [], master=True),
+        config.Control('Game', [ '<steamgame>' ]),
+        config.Control('Browser', [ 'chrome', '~fox', 'r`ms.*' ]),
+        config.Control('Voice', [ 'discord', 'teams', 'zoom' ], only_first=True)
+    ] + [ auto_fill ] * config.BUTTON_COUNT
+
+@pytest.mark.parametrize('count', SESSION_COUNTS)
+def test_matching(benchmark, count):
+    audio = FakeAudioBackend.generate(count, devices=FAKE_DEVICES)
+    process_cache = ProcessCache(audio)
+    process_cache.update(audio.sessions)
+    matcher = SessionMatcher(scaling_controls(), GAMES, config.BUTTON_COUNT)
+    matches = benchmark(matcher.match, audio.sessions, process_cache.name, None, audio)
+    assert matches[0][0].master
+
+@pytest.mark.parametrize('count', SESSION_COUNTS)
+def test_volume_stepping(benchmark, count):
+    # One step of a control holding every session, written like the volume writer applies a group
+    audio = FakeAudioBackend.generate(count)
+    group = GroupVolume({ session: audio.get_session_volume(session) for session in audio.sessions })
+    writer = VolumeWriter(audio, 0, 4)
+    deltas = iter([ -0.01, 0.01 ] * 100000)
+
+    def step():
+        writer.apply_all(audio.set_session_volume, group.step(next(deltas)).items())
+
+    benchmark(step)
+    assert audio.calls['SetMasterVolume'] >= count
+
+@pytest.mark.parametrize('count', SESSION_COUNTS)
+def test_title_resolution(benchmark, count):
+    audio = FakeAudioBackend.generate(count)
+    windows = FakeWindowBackend.for_sessions(audio.sessions)
+    resolver = TitleResolver(windows)
+    pids = [ session.ProcessId for session in audio.sessions ]
+
+    def resolve():
+        # Titles are resolved again every time the overlay is shown
+        resolver.invalidate()
+        return [ resolver.title(pid) for pid in pids ]
+
+    titles = benchmark(resolve)
+    assert all(titles)
+
+@pytest.mark.parametrize('count', SESSION_COUNTS)
+def test_widget_construction(benchmark, qapp, config_dir, count):
+    config.PEAK_METERS = False
+    config.RANK_AUTO_FILL = False
+    import overlay
+    from backends import create_backends
+    from conftest import settle
+    overlay.set_backends(create_backends('fake', count))
+    sessions = overlay.audio_backend.get_all_sessions()
+    widgets = []
+
+    def construct():
+        widget = overlay.OverlayWidget(scaling_controls(), sessions)
+        widgets.append(widget)
+        return widget
+
+    widget = benchmark.pedantic(construct, rounds=5, iterations=1)
+    assert 0 < len(widget.active_controls) <= config.BUTTON_COUNT
+    for widget in widgets:
+        widget.reset()
+        widget.deleteLater()
+    settle(qapp, 20)
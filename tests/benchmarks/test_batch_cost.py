@@ -0,0 +1,51 @@
+import time
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+from audio import FakeAudioBackend
+from batch import BatchRunner
+from matcher import SteamGameIndex
+
+COMMAND_COUNT = 20
+LATENCY = 0.0005 # Per backend call
+
+@pytest.fixture
+def runner(config_dir):
+    config.CONTROLS = [ config.Control('Master', [], master=True) ] + [ config.Control('App', [ '<all>' ], False, True, True) ] * config.BUTTON_COUNT
+    return BatchRunner(FakeAudioBackend.generate(50, latency=LATENCY), SteamGameIndex([]))
+
+def commands() -> list:
+    return [ f'adjust {i % config.BUTTON_COUNT + 1} {-1 if i % 2 else 1}' for i in range(COMMAND_COUNT) ]
+
+def timed_rounds(fn, times: list):
+    """Times every round itself, with --benchmark-disable there are no stats and only one round."""
+    def run(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            times.append(time.perf_counter() - start)
+    return run
+
+def cost(times: list, calls: int) -> dict:
+    return dict(ms_per_command=round(sum(times) / len(times) * 1000 / COMMAND_COUNT, 3), backend_calls=calls // len(times))
+
+@pytest.mark.benchmark(group='batch')
+def test_one_batch(benchmark, runner):
+    runner.backend.calls.clear()
+    times = []
+    results = benchmark.pedantic(timed_rounds(runner.run, times), (commands(),), rounds=5, iterations=1)
+    benchmark.extra_info.update(cost(times, sum(runner.backend.calls.values())))
+    assert not any('error' in result for result in results)
+    assert runner.backend.calls['GetAllSessions'] == len(times)
+
+@pytest.mark.benchmark(group='batch')
+def test_separate_runs(benchmark, runner):
+    # Like one invocation per command, every command enumerates the sessions again
+    runner.backend.calls.clear()
+    times = []
+    benchmark.pedantic(timed_rounds(lambda: [ runner.run([ command ]) for command in commands() ], times), rounds=5, iterations=1)
+    benchmark.extra_info.update(cost(times, sum(runner.backend.calls.values())))
+    assert runner.backend.calls['GetAllSessions'] == len(times) * COMMAND_COUNT
@@ -0,0 +1,39 @@
+import json
+import os
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+
+def large_config() -> dict:
+    return {
+        'button_count': 12,
+        'fg_color': '#222',
+        'steamapp_exlusions': [ f'tool{i}.*' for i in range(50) ],
+        'controls': [
+            { 'name': f'Control {i}', 'target_applications': [ f'app{i}', f'~part{i}', f'r`game{i}.*', f'r`(x|y){i}' ], 'bg_color': '#336699', 'bg_color2': '#112233' }
+            for i in range(40)
+        ]
+    }
+
+@pytest.fixture
+def config_file(config_dir):
+    (config_dir / config.CONFIG_FILE).write_text(json.dumps(large_config()))
+    return config_dir
+
+@pytest.mark.benchmark(group='config load')
+def test_cold_load(benchmark, config_file):
+    def cold():
+        if os.path.exists(config.CONFIG_CACHE_FILE):
+            os.remove(config.CONFIG_CACHE_FILE)
+        config.load()
+
+    benchmark(cold)
+    assert len(config.CONTROLS) == 52
+
+@pytest.mark.benchmark(group='config load')
+def test_warm_load(benchmark, config_file):
+    config.load()
+    benchmark(config.load)
+    assert len(config.CONTROLS) == 52
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+from audio import FakeAudioBackend
+from volume import GroupVolume, VolumeWriter
+
+LATENCY = 0.0005 # Per backend call
+
+def group_step(count: int, workers: int):
+    audio = FakeAudioBackend.generate(count, latency=LATENCY)
+    group = GroupVolume({ session: audio.get_session_volume(session) for session in audio.sessions })
+    writer = VolumeWriter(audio, 0, workers)
+    deltas = iter([ -0.01, 0.01 ] * 10000)
+
+    def step():
+        writer.apply_all(audio.set_session_volume, group.step(next(deltas)).items())
+
+    return audio, group, step
+
+@pytest.mark.parametrize('count', [ 1, 4, 16, 64 ])
+@pytest.mark.parametrize('workers', [ 1, config.VOLUME_WORKERS ], ids=[ 'serial', 'pool' ])
+def test_step_latency(benchmark, count, workers):
+    benchmark.group = f'group step {count} sessions'
+    audio, group, step = group_step(count, workers)
+    ratios = dict(group.ratios)
+    audio.calls.clear()
+    steps = []
+    # With --benchmark-disable only one round runs
+    benchmark.pedantic(lambda: steps.append(step()), rounds=10, iterations=1)
+    # One write per session and step, no reads, and every session keeps its ratio to the loudest one
+    assert audio.calls == { 'SetMasterVolume': count * len(steps) }
+    assert group.ratios == ratios
+    assert [ session.volume for session in audio.sessions ] == pytest.approx(list(group.levels().values()))
@@ -0,0 +1,39 @@
+import random
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+from audio import FAKE_APPS, FakeSession
+from matcher import SessionMatcher, SteamGameIndex
+from test_matcher import reference_match
+
+def synthetic_library(rng: random.Random, count: int) -> list:
+    return sorted({ ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 14))) for _ in range(count) })
+
+@pytest.fixture(scope='module')
+def workload():
+    # Large libraries have thousands of executables, a few of them are running
+    rng = random.Random(0)
+    games = synthetic_library(rng, 5000)
+    sessions = [ FakeSession(1000 + i, f'{rng.choice(FAKE_APPS + games[:20])}.exe') for i in range(200) ]
+    auto_fill = config.Control('App', [ '<all>' ], False, True, True)
+    controls = [
+        config.Control('Master', [], master=True),
+        config.Control('Game', [ '<steamgame>' ]),
+        config.Control('Browser', [ 'chrome', '~fox', 'r`ms.*', 'r`edge' ]),
+        config.Control('Voice', [ 'discord', 'teams', 'zoom' ], only_first=True)
+    ] + [ auto_fill ] * config.BUTTON_COUNT
+    return controls, sessions, games
+
+@pytest.mark.benchmark(group='matcher')
+def test_nested_loops(benchmark, workload):
+    controls, sessions, games = workload
+    benchmark.pedantic(reference_match, (controls, sessions, games, config.BUTTON_COUNT), rounds=3, iterations=1)
+
+@pytest.mark.benchmark(group='matcher')
+def test_session_matcher(benchmark, workload):
+    controls, sessions, games = workload
+    index = SteamGameIndex(games)
+    result = benchmark(lambda: SessionMatcher(controls, index, config.BUTTON_COUNT).match(sessions))
+    assert result == reference_match(controls, sessions, games, config.BUTTON_COUNT)
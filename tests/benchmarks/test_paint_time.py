@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+import render
+from PySide6 import QtGui
+from PySide6.QtCore import Qt
+
+def paint(widget, cached: bool):
+    # Renders through paintEvent like a repaint does, uncached runs draw every background again
+    if not cached:
+        render.cache.clear()
+    target = QtGui.QPixmap(widget.size())
+    target.fill(Qt.transparent)
+    widget.render(target)
+
+@pytest.fixture
+def shown(make_overlay):
+    return make_overlay(6, [ config.Control('Master', [], master=True), config.Control('Gradient', [ '<all>' ], bg_color='#336699', bg_color2='#ccddee') ])
+
+@pytest.mark.parametrize('cached', [ True, False ], ids=[ 'cached', 'uncached' ])
+@pytest.mark.parametrize('focused', [ False, True ], ids=[ 'idle', 'focused' ])
+def test_control_paint(benchmark, shown, focused, cached):
+    widget = shown.centralWidget().active_controls[1]
+    if focused:
+        widget.focus()
+    benchmark.group = f'control paint {"focused" if focused else "idle"}'
+    paint(widget, True)
+    misses = render.cache.misses
+    benchmark(paint, widget, cached)
+    if cached:
+        assert render.cache.misses == misses
+
+@pytest.mark.parametrize('cached', [ True, False ], ids=[ 'cached', 'uncached' ])
+def test_overlay_paint(benchmark, shown, cached):
+    # The whole window with the screen edge shade, as painted on every fade step
+    benchmark.group = 'overlay paint'
+    paint(shown, True)
+    misses = render.cache.misses
+    benchmark(paint, shown, cached)
+    if cached:
+        assert render.cache.misses == misses
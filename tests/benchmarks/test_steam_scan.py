@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from steamgames import collect_steam_games, scan_library_folders
+from test_steamgames import make_library
+
+GAME_COUNT = 300 # Games per library, two libraries
+
+@pytest.fixture(scope='module')
+def library(tmp_path_factory):
+    return make_library(str(tmp_path_factory.mktemp('steam')), GAME_COUNT)
+
+@pytest.mark.benchmark(group='steam scan')
+def test_cold_scan(benchmark, library):
+    games = benchmark.pedantic(lambda: collect_steam_games(scan_library_folders(library, {}), []), rounds=5, iterations=1)
+    assert len(games) == GAME_COUNT * 4
+
+@pytest.mark.benchmark(group='steam scan')
+def test_indexed_scan(benchmark, library):
+    # Nothing changed since the index was written, only the directory mtimes are checked
+    index = scan_library_folders(library, {})
+    games = benchmark.pedantic(lambda: collect_steam_games(scan_library_folders(library, index), []), rounds=5, iterations=1)
+    assert len(games) == GAME_COUNT * 4
@@ -0,0 +1,47 @@
+import time
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import config
+from PySide6 import QtCore, QtGui
+from PySide6.QtCore import Qt
+
+BURST = 40 # Key events of one fast wheel spin
+SESSION_COUNT = 20
+LATENCY = 0.001 # Per backend call, about a COM round trip
+
+def key(window, key: int, text: str = ''):
+    window.keyPressEvent(QtGui.QKeyEvent(QtCore.QEvent.KeyPress, key, Qt.NoModifier, text))
+
+@pytest.mark.parametrize('master', [ False, True ], ids=[ 'sessions', 'master' ])
+def test_key_burst(benchmark, make_overlay, master):
+    import overlay
+    control = config.Control('Master', [], master=True) if master else config.Control('All', [ '<all>' ])
+    window = make_overlay(SESSION_COUNT, [ control ], LATENCY)
+    key(window, Qt.Key_1, '1')
+    overlay.volume_writer.flush()
+    calls = overlay.audio_backend.calls
+    calls.clear()
+
+    times = []
+
+    def burst():
+        # Down then up again, so no step is clamped
+        start = time.perf_counter()
+        for i in range(BURST):
+            key(window, Qt.Key_Down if i < BURST // 2 else Qt.Key_Up)
+        times.append(time.perf_counter() - start)
+
+    # Timed here too, with --benchmark-disable there are no stats and only one round
+    benchmark.pedantic(burst, rounds=5, iterations=1)
+    gui_ms = sum(times) / len(times) * 1000
+    overlay.volume_writer.flush()
+
+    writes = calls['SetMasterVolumeLevelScalar'] if master else calls['SetMasterVolume']
+    benchmark.extra_info.update(gui_ms=round(gui_ms, 2), backend_calls=sum(calls.values()), writes=writes)
+    # Levels are tracked locally and the latest write per control wins
+    assert calls['GetMasterVolume'] == calls['GetMasterVolumeLevelScalar'] == 0
+    assert writes < BURST * len(times) * (1 if master else SESSION_COUNT)
+    # The GUI thread never waits on a backend call
+    assert gui_ms < BURST * LATENCY * 1000
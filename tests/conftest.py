@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import pytest
+
+# The modules live at the top of the repository, Qt draws without a display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+SESSION_COUNTS = (10, 100, 1000)
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    """Runs the test in an empty directory, the config settings are restored afterwards."""
+    import config
+    monkeypatch.chdir(tmp_path)
+    saved = { name: getattr(config, name) for name in config.DEFAULTS }
+    yield tmp_path
+    for name, value in saved.items():
+        setattr(config, name, value)
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PySide6 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+def settle(app, ms: int = 100):
+    """Runs the event loop for ms milliseconds, so animations finish and repaints are delivered."""
+    end = time.monotonic() + ms / 1000
+    while time.monotonic() < end:
+        app.processEvents()
+        time.sleep(0.002)
+
+@pytest.fixture
+def make_overlay(qapp, config_dir):
+    """Builds a shown overlay on the fake backend with the given controls and session count."""
+    import config
+    config.MONITOR = 0 # The offscreen platform has a single screen
+    config.PEAK_METERS = False
+    config.RANK_AUTO_FILL = False
+    config.WATCH_CONFIG = False
+    import overlay
+    from backends import create_backends
+    windows = []
+
+    def make(session_count: int = 6, controls: list = None, latency: float = 0.0):
+        if controls is not None:
+            config.CONTROLS = controls
+        overlay.set_backends(create_backends('fake', session_count, latency))
+        window = overlay.Overlay([], True)
+        window.startup_loaded('sessions', overlay.create_session_registry())
+        window.show()
+        windows.append(window)
+        settle(qapp)
+        return window
+
+    yield make
+    for window in windows:
+        window.centralWidget().reset()
+        window.hide()
+        window.deleteLater()
+    overlay.session_registry = None
+    settle(qapp, 20)
@@ -0,0 +1,68 @@
+import config
+from audio import FAKE_DEVICES, FakeAudioBackend
+from conftest import settle
+
+STEPS = 20
+
+def test_interfaces_are_activated_once():
+    audio = FakeAudioBackend.generate(8, devices=FAKE_DEVICES)
+    for i in range(STEPS):
+        audio.set_master_volume(audio.get_master_volume() - 0.01)
+        for session in audio.sessions:
+            audio.set_session_volume(session, i / STEPS)
+            audio.get_session_volume(session)
+        audio.refresh()
+    assert audio.calls['ActivateEndpoint'] == 1
+    assert audio.calls['ActivateSession'] == len(audio.sessions)
+    assert audio.calls['SetMasterVolumeLevelScalar'] == STEPS
+
+def test_endpoint_is_activated_again_after_default_device_changes():
+    audio = FakeAudioBackend.generate(2, devices=FAKE_DEVICES)
+    audio.get_master_volume()
+    audio.refresh()
+    audio.get_master_volume()
+    assert audio.calls['ActivateEndpoint'] == 1
+    audio.set_default_device('headphones')
+    audio.refresh()
+    audio.set_master_volume(0.4)
+    audio.get_master_volume()
+    assert audio.calls['ActivateEndpoint'] == 2
+    assert audio.fake_devices['headphones'].master == 0.4
+    assert audio.calls['ActivateSession'] == 0
+
+def test_overlay_steps_reuse_interfaces(qapp, make_overlay):
+    import overlay
+    controls = [ config.Control('Master', [], master=True), config.Control('All', [ '<all>' ]) ]
+    window = make_overlay(6, controls)
+    audio = overlay.audio_backend
+    master, apps = window.centralWidget().active_controls
+    activations = audio.calls['ActivateEndpoint'], audio.calls['ActivateSession']
+    for _ in range(STEPS):
+        master.change_volume(-0.01)
+        apps.change_volume(-0.01)
+        overlay.volume_writer.flush()
+    settle(qapp)
+    assert audio.calls['ActivateEndpoint'] == 1
+    assert audio.calls['ActivateSession'] == len(audio.sessions)
+    assert (audio.calls['ActivateEndpoint'], audio.calls['ActivateSession']) == activations
+
+def test_process_snapshot_reads_only_wanted_processes():
+    import os
+    import psutil
+    from types import SimpleNamespace
+    from audio import WindowsAudioBackend
+    created = []
+
+    class Process(psutil.Process):
+        def __init__(self, pid):
+            created.append(pid)
+            super().__init__(pid)
+
+        def exe(self):
+            raise psutil.AccessDenied(self.pid)
+
+    backend = SimpleNamespace(psutil=SimpleNamespace(pids=psutil.pids, Process=Process, Error=psutil.Error))
+    missing = max(psutil.pids()) + 100000
+    snapshot = WindowsAudioBackend.process_snapshot(backend, [ os.getpid(), missing ])
+    assert snapshot == { os.getpid(): (psutil.Process().name(), '') }
+    assert created == [ os.getpid() ]
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import config
+from audio import FakeAudioBackend, FakeSession
+from batch import BatchRunner, CommandError, parse_command, split_commands
+from matcher import SteamGameIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def runner(config_dir):
+    config.CONTROLS = [ config.Control('Master', [], master=True), config.Control('Browser', [ 'chrome' ]), config.Control('Voice', [ 'discord' ]) ]
+    audio = FakeAudioBackend([ FakeSession(1, 'chrome.exe', 0.8), FakeSession(2, 'chrome.exe', 0.4), FakeSession(3, 'discord.exe', 0.5) ], master=0.5)
+    return BatchRunner(audio, SteamGameIndex([]))
+
+def test_parse_command():
+    assert parse_command('set Voice Chat 40%') == ('set', 'Voice Chat', 0.4)
+    assert parse_command('mute 2') == ('mute', '2', None)
+    assert split_commands('set 1 10; adjust 2 -5\nquery 3;') == [ 'set 1 10', 'adjust 2 -5', 'query 3' ]
+    for text in ('', 'louder 1', 'set 1', 'set 1 loud'):
+        with pytest.raises(CommandError):
+            parse_command(text)
+
+def test_batch_uses_one_snapshot(runner):
+    results = runner.run([ 'adjust master 10', 'set browser 40', 'mute voice', 'query 3', 'set nothing 10' ])
+    assert runner.backend.calls['GetAllSessions'] == 1
+    assert results[0]['level'] == 0.6
+    # The loudest session is set, the other one keeps its ratio
+    assert results[1] == { 'command': 'set', 'control': 'Browser', 'level': 0.4, 'muted': False, 'sessions': 2 }
+    assert [ session.volume for session in runner.backend.sessions[:2] ] == pytest.approx([ 0.4, 0.2 ])
+    assert results[2]['muted'] is True and results[3]['muted'] is True
+    assert results[4]['error'] == "No control named 'nothing'"
+
+def test_batch_skips_qt(tmp_path):
+    (tmp_path / 'conf.json').write_text(json.dumps({ 'backend': 'fake', 'controls': [ { 'name': 'Master', 'master': True } ] }))
+    script = f'import sys; sys.path.insert(0, {ROOT!r}); sys.argv = [ "main.py", "--batch", "query master" ]\nimport main\ntry:\n    main.main()\nexcept SystemExit as e:\n    print(e.code, "PySide6" in sys.modules)'
+    result = subprocess.run([ sys.executable, '-c', script ], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.stdout.splitlines()[-1] == '0 False', result.stdout + result.stderr
+    assert json.loads(result.stdout.splitlines()[0])['control'] == 'Master'
@@ -0,0 +1,107 @@
+import json
+import os
+import pytest
+import config
+from matcher import SessionMatcher
+
+def write_config(directory, settings: dict):
+    (directory / config.CONFIG_FILE).write_text(json.dumps(settings))
+
+def test_default_controls_take_configured_colors(config_dir):
+    write_config(config_dir, { 'fg_color': '#ff0000', 'bg_color': '#00ff00' })
+    config.load()
+    assert config.CONTROLS
+    for control in config.CONTROLS + [ config.AUTO_FILL_CONTROL ]:
+        assert (control.fg_color, control.bg_color) == ('#ff0000', '#00ff00')
+        assert (control.fg_rgba, control.bg_rgba) == ((255, 0, 0, 255), (0, 255, 0, 255))
+
+def test_control_colors_override_defaults(config_dir):
+    write_config(config_dir, { 'fg_color': '#ff0000', 'controls': [ { 'name': 'A', 'target_applications': [ 'a' ], 'fg_color': '#0000ff' }, { 'target_applications': [ 'b' ] } ] })
+    config.load()
+    assert [ control.fg_color for control in config.CONTROLS[:2] ] == [ '#0000ff', '#ff0000' ]
+    assert config.CONTROLS[1].name == 'Control 2'
+
+def test_auto_fill_repeats_one_immutable_control(config_dir):
+    write_config(config_dir, { 'button_count': 3, 'controls': [] })
+    config.load()
+    assert config.CONTROLS == [ config.AUTO_FILL_CONTROL ] * 3
+    with pytest.raises(AttributeError):
+        config.AUTO_FILL_CONTROL.fg_color = '#000'
+
+def test_creates_default_config(config_dir):
+    config.load()
+    with open(config.CONFIG_FILE) as file:
+        written = json.load(file)
+    assert [ control['name'] for control in written['controls'] ] == [ 'Game', 'Discord' ]
+
+def test_validation_reports_every_error(config_dir):
+    write_config(config_dir, {
+        'monitor': True,
+        'steam_library_folders': [ 1 ],
+        'backend': 'alsa',
+        'controls': [ { 'target_applications': [ '' ] }, { 'target_applications': [ 'r`(' ] }, 'master' ],
+        'not_a_setting': 1
+    })
+    with pytest.raises(config.ConfigError) as error:
+        config.load()
+    message = str(error.value)
+    for expected in (
+        'monitor: expected int, got bool',
+        'steam_library_folders: expected a list of strings',
+        'backend: expected one of auto, windows, fake',
+        'controls[0].target_applications[0]: expected a non empty string',
+        'controls[1]:',
+        'controls[2]: expected dict, got str'
+    ):
+        assert expected in message
+    assert not os.path.exists(config.CONFIG_CACHE_FILE)
+
+def test_cache_skips_parsing(config_dir, monkeypatch):
+    write_config(config_dir, { 'button_count': 2, 'controls': [ { 'name': 'A', 'target_applications': [ 'r`a.*' ] } ] })
+    config.load()
+    cold = config.CONTROLS
+    monkeypatch.setattr(config, 'parse', lambda _: pytest.fail('parsed again'))
+    config.load()
+    assert config.comparable(config.CONTROLS) == config.comparable(cold)
+    assert config.CONTROLS[0].targets == cold[0].targets
+    # Only the mtime changed, the hash still matches
+    stat = os.stat(config.CONFIG_FILE)
+    os.utime(config.CONFIG_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    config.load()
+
+def test_cache_invalidated_by_changes(config_dir):
+    write_config(config_dir, { 'button_count': 2 })
+    config.load()
+    write_config(config_dir, { 'button_count': 5 })
+    config.load()
+    assert config.BUTTON_COUNT == 5
+
+DAMAGED_CACHES = {
+    'list': lambda cache: list(cache),
+    'none': lambda cache: None,
+    'no_stat': lambda cache: { key: value for key, value in cache.items() if key != 'stat' },
+    'bad_settings': lambda cache: dict(cache, settings=[])
+}
+
+@pytest.mark.parametrize('damage', DAMAGED_CACHES.values(), ids=DAMAGED_CACHES.keys())
+def test_damaged_cache_is_ignored(config_dir, damage):
+    import pickle
+    write_config(config_dir, { 'button_count': 3 })
+    config.load()
+    with open(config.CONFIG_CACHE_FILE, 'rb') as file:
+        cache = pickle.load(file)
+    with open(config.CONFIG_CACHE_FILE, 'wb') as file:
+        pickle.dump(damage(cache), file)
+    config.BUTTON_COUNT = 0
+    config.load()
+    assert config.BUTTON_COUNT == 3
+
+def test_patterns_validated_like_the_matcher_compiles_them(config_dir):
+    # Inline global flags cannot be combined into one alternation, they are matched separately
+    write_config(config_dir, { 'controls': [ { 'name': 'A', 'target_applications': [ 'r`(?i)foo', 'r`bar' ] } ] })
+    config.load()
+    SessionMatcher(config.CONTROLS, [], config.BUTTON_COUNT)
+    write_config(config_dir, { 'controls': [ { 'name': 'A', 'target_applications': [ 'r`bar', 'r`(?i' ] } ] })
+    with pytest.raises(config.ConfigError) as error:
+        config.load()
+    assert 'controls[0]:' in str(error.value)
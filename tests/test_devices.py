@@ -0,0 +1,74 @@
+import pytest
+import config
+from audio import FAKE_DEVICES, DeviceNotFound, FakeAudioBackend, FakeSession
+from matcher import SessionMatcher
+from conftest import settle
+
+@pytest.fixture
+def backend():
+    sessions = [ FakeSession(1, 'game.exe', device_id='speakers'), FakeSession(2, 'discord.exe', device_id='headphones'), FakeSession(3, 'chrome.exe') ]
+    return FakeAudioBackend(sessions, devices=FAKE_DEVICES)
+
+def test_topology_is_cached_until_devices_change(backend):
+    changes = []
+    backend.device_listeners.append(lambda: changes.append(True))
+    backend.devices()
+    backend.devices()
+    backend.refresh()
+    assert backend.calls['EnumAudioEndpoints'] == 1
+    backend.add_device('usb', 'USB Headset')
+    assert changes == [ True ]
+    assert backend.find_device('usb headset').id == 'usb'
+    assert backend.calls['EnumAudioEndpoints'] == 2
+
+def test_find_device(backend):
+    assert backend.find_device('headphones').name == 'Headphones'
+    assert backend.find_device('SPEAK').id == 'speakers'
+    assert backend.find_device('Micro').flow == 'capture'
+    assert backend.find_device('Micro', 'render') is None
+    assert backend.endpoint_device('') is None
+
+def test_endpoint_interfaces_are_reused(backend):
+    backend.set_master_volume(0.3, 'headphones')
+    assert backend.get_master_volume('headphones') == 0.3
+    assert backend.get_master_volume(None) == 1.0
+    assert backend.calls['ActivateEndpoint'] == 2
+
+def test_disconnected_endpoint_never_falls_back(backend):
+    device = backend.endpoint_device('Headphones')
+    backend.get_master_volume(device)
+    backend.remove_device('headphones')
+    with pytest.raises(DeviceNotFound):
+        backend.endpoint_device('Headphones')
+    # An interface held from before the removal fails too
+    with pytest.raises(DeviceNotFound):
+        backend.set_master_volume(0.1, device)
+    assert backend.get_master_volume(None) == 1.0
+
+def test_matching_filters_by_endpoint(backend):
+    controls = [ config.Control('Phones', [ '<all>' ], endpoint='Headphones'), config.Control('Speakers', [ '<all>' ], endpoint='speakers'), config.Control('Missing', [ '<all>' ], endpoint='HDMI') ]
+    matches = SessionMatcher(controls, []).match(backend.sessions, devices=backend)
+    # Sessions without a device play on the default one
+    assert [ (control.name, [ session.ProcessId for session in sessions ]) for control, sessions in matches ] == [ ('Phones', [ 2 ]), ('Speakers', [ 1, 3 ]) ]
+
+def test_overlay_follows_device_changes(qapp, make_overlay):
+    import overlay
+    controls = [ config.Control('Master', [], master=True), config.Control('Phones', [], master=True, endpoint='Headphones') ]
+    window = make_overlay(6, controls)
+    audio = overlay.audio_backend
+    overlay_widget = window.centralWidget()
+    assert [ widget.control.name for widget in overlay_widget.active_controls ] == [ 'Master', 'Phones' ]
+    phones = overlay_widget.active_controls[1]
+
+    audio.remove_device('headphones')
+    settle(qapp)
+    assert [ widget.control.name for widget in overlay_widget.active_controls ] == [ 'Master' ]
+    # A step queued before the removal must not change another device
+    phones.change_volume(-0.5)
+    overlay.volume_writer.flush()
+    assert audio.fake_devices['speakers'].master == 1.0
+
+    audio.add_device('headphones', 'Headphones', master=0.5)
+    settle(qapp)
+    assert [ widget.control.name for widget in overlay_widget.active_controls ] == [ 'Master', 'Phones' ]
+    assert overlay_widget.active_controls[1].vl == 0.5
@@ -0,0 +1,83 @@
+import random
+import re
+import pytest
+import config
+from audio import FakeSession
+from matcher import SessionMatcher
+
+NAMES = [ 'Chrome', 'firefox', 'Discord', 'vlc', 'obs64', 'steam', 'GameOne', 'gamex', 'zoom', 'ste', '' ]
+TARGETS = [ '<steamgame>', '<all>', 'r`ch.*', 'r`(?i)gam', 'r`(di|ob)s', 'r`.*4$', 'r`z[o]+', '~fox', '~am', 'vlc', 'discord', 'chrome', 'zoom' ]
+GAMES = [ 'game', 'ste', 'vl', 'obs', 'gamex', 'firefoxy' ]
+
+def reference_match(controls: list, sessions: list, steam_games: list, limit: int) -> list:
+    """The nested loops OverlayWidget.__init__ matched with before SessionMatcher."""
+    active = []
+    for control in controls:
+        matched = []
+        if control.master is False:
+            for session in sessions:
+                if session.Process:
+                    passed = False
+                    name = session.Process.name()[:-4].lower()
+                    for app in control.target_applications:
+                        if app == '<steamgame>':
+                            for game in steam_games:
+                                if name.startswith(game):
+                                    passed = True
+                        elif app == '<all>':
+                            passed = True
+                        elif app[:2] == 'r`' and re.match(app[2:], name, re.IGNORECASE) is not None:
+                            passed = True
+                        elif app[0] == '~' and app[1:] in name:
+                            passed = True
+                        elif app == name:
+                            passed = True
+                    for c, s in active:
+                        if len(s) and s[0].Process.name()[:-4].lower() == name:
+                            passed = False
+                            break
+                    if passed:
+                        matched.append(session)
+            if control.only_first and len(matched) > 1:
+                matched = [ matched[0] ]
+        if len(matched) or control.master is True:
+            active.append((control, matched))
+            if len(active) == limit:
+                break
+    return active
+
+def random_case(rng: random.Random) -> tuple:
+    sessions = [ FakeSession(1000 + i, f'{name}.exe' if name else '') for i, name in enumerate(rng.choice(NAMES) for _ in range(rng.randint(0, 24))) ]
+    distinct = [
+        config.Control(f'Control {i}', rng.sample(TARGETS, rng.randint(1, 4)), only_first=rng.random() < 0.3, master=rng.random() < 0.1)
+        for i in range(rng.randint(1, 6))
+    ]
+    # Auto fill repeats the same instance
+    controls = distinct + [ rng.choice(distinct) ] * rng.randint(0, 8)
+    rng.shuffle(controls)
+    games = rng.sample(GAMES, rng.randint(0, len(GAMES)))
+    limit = rng.choice([ None, 1, 3, 8 ])
+    return controls, sessions, games, limit
+
+def test_matches_nested_loops():
+    rng = random.Random(2)
+    for case in range(3000):
+        controls, sessions, games, limit = random_case(rng)
+        expected = reference_match(controls, sessions, games, limit)
+        assert SessionMatcher(controls, games, limit).match(sessions) == expected, f'case {case}'
+
+@pytest.mark.parametrize('targets, name, matched', [
+    ([ 'r`a', 'r`(b)' ], 'bob', True),
+    ([ 'r`a', 'r`c' ], 'cab', True),
+    ([ 'r`(?i)foo', 'r`bar' ], 'foobar', True),
+    ([ 'r`(?i)foo', 'r`bar' ], 'bar', True),
+    ([ 'r`(?i)foo', 'r`bar' ], 'baz', False),
+    ([ '~x' ], 'box', True),
+    ([ '<steamgame>' ], 'gamex', True),
+    ([ '<steamgame>' ], 'gam', False)
+])
+def test_target_kinds(targets, name, matched):
+    control = config.Control('Test', targets)
+    session = FakeSession(1, f'{name}.exe')
+    result = SessionMatcher([ control ], [ 'game' ]).match([ session ])
+    assert (result == [ (control, [ session ]) ]) is matched
@@ -0,0 +1,48 @@
+import time
+from collections import Counter
+from meters import PeakSampler
+
+def sampler(reads: Counter, activity_window: float = 0.3) -> PeakSampler:
+    def read_peak(session):
+        reads[session] += 1
+        return 0.5
+    return PeakSampler(read_peak, lambda changed: None, 0.01, activity_interval=0.05, activity_window=activity_window)
+
+def test_nothing_is_read_while_paused():
+    reads = Counter()
+    peak_sampler = sampler(reads)
+    peak_sampler.set_sessions([ 'a' ])
+    peak_sampler.set_candidates([ 'a', 'b' ])
+    time.sleep(0.2)
+    assert not reads
+    assert peak_sampler.activity() == {}
+
+def test_activity_is_sampled_only_after_resume():
+    reads = Counter()
+    peak_sampler = sampler(reads)
+    peak_sampler.set_candidates([ 'a', 'b' ])
+    peak_sampler.resume()
+    time.sleep(0.6)
+    assert peak_sampler.activity() == { 'a': 0.5, 'b': 0.5 }
+    sampled = reads['b']
+    assert 2 <= sampled <= 8 # Every 0.05s for 0.3s, not for as long as the overlay stays shown
+    time.sleep(0.2)
+    assert reads['b'] == sampled
+    peak_sampler.pause()
+    peak_sampler.resume() # Shown again, a new window starts
+    time.sleep(0.2)
+    assert reads['b'] > sampled
+
+def test_rank_reads_no_peaks(qapp, make_overlay):
+    import config
+    import overlay
+    window = make_overlay(6)
+    config.RANK_AUTO_FILL = True
+    overlay_widget = window.centralWidget()
+    reads = Counter()
+    overlay_widget.peak_sampler = sampler(reads)
+    overlay_widget.rank(overlay.audio_backend.sessions)
+    # Nothing was sampled yet, so usage alone ranks without reading any peaks
+    assert not reads
+    assert overlay_widget.peak_sampler.candidates == overlay.audio_backend.sessions
+    assert overlay_widget.ranking
@@ -0,0 +1,49 @@
+import config
+import render
+from animation import timeline
+from PySide6 import QtCore, QtGui
+from PySide6.QtCore import Qt
+from conftest import settle
+
+def key(window, key: int, text: str = ''):
+    window.keyPressEvent(QtGui.QKeyEvent(QtCore.QEvent.KeyPress, key, Qt.NoModifier, text))
+
+def controls() -> list:
+    return [ config.Control('Master', [], master=True), config.Control('App', [ '<all>' ], False, True, True) ]
+
+def test_window_fits_control_column(qapp, make_overlay):
+    config.SHADE_WIDTH = 200 # The offscreen screen is only 800 pixels wide
+    window = make_overlay(6, controls())
+    monitor = window.screen().availableGeometry()
+    assert window.height() == monitor.height()
+    assert window.width() == min(monitor.width(), window.centralWidget().sizeHint().width() + config.SHADE_WIDTH)
+    assert window.width() < monitor.width()
+
+def test_volume_step_repaints_one_control(qapp, make_overlay):
+    window = make_overlay(6, controls())
+    overlay_widget = window.centralWidget()
+    key(window, Qt.Key_1, '1')
+    settle(qapp, 200) # Focus animation
+    control = overlay_widget.focused_control
+    assert control is overlay_widget.active_controls[0]
+
+    for _ in range(3):
+        render.stats.reset()
+        timeline.layout_passes = 0
+        key(window, Qt.Key_Down)
+        settle(qapp)
+        stats = render.stats.to_dict()
+        assert stats['paints'] == { 'VolumeControlWidget': 1, 'OverlayWidget': 1 }
+        assert stats['area']['VolumeControlWidget'] == control.width() * control.height()
+        # Only the shade underneath the control is recomposed, never the whole window
+        assert stats['area']['OverlayWidget'] <= control.width() * control.height()
+        assert timeline.layout_passes == 0
+
+def test_clamped_step_paints_nothing(qapp, make_overlay):
+    window = make_overlay(6, controls())
+    key(window, Qt.Key_1, '1')
+    settle(qapp, 200)
+    render.stats.reset()
+    key(window, Qt.Key_Up) # Master starts at 100%
+    settle(qapp)
+    assert render.stats.to_dict()['paints'] == {}
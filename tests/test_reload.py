@@ -0,0 +1,103 @@
+import json
+import os
+import time
+import pytest
+import config
+from conftest import settle
+
+CONTROLS = [
+    { 'name': 'Master', 'master': True },
+    { 'name': 'Browser', 'target_applications': [ 'chrome', 'firefox', 'msedge' ] },
+    { 'name': 'App', 'target_applications': [ '<all>' ] }
+]
+
+def write_config(settings: dict):
+    # A new mtime and size, so the cache never hides the change
+    with open(config.CONFIG_FILE, 'w') as file:
+        json.dump(settings, file)
+
+def wait_for(qapp, condition, timeout: float = 3.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        settle(qapp, 20)
+    return False
+
+def test_reload_returns_changed_settings(config_dir):
+    write_config({ 'fg_color': '#111', 'spacer_position': 2 })
+    config.load()
+    config.RESIDENT = True # From the command line
+    write_config({ 'fg_color': '#222' })
+    changed = config.reload()
+    assert set(changed) == { 'FG_COLOR', 'SPACER_POSITION', 'CONTROLS', 'AUTO_FILL_CONTROL' }
+    assert config.SPACER_POSITION == config.DEFAULTS['SPACER_POSITION']
+    assert config.RESIDENT is True
+    write_config({ 'fg_color': '#222', 'debug': False })
+    assert config.reload() == []
+
+def test_invalid_reload_keeps_settings(config_dir):
+    write_config({ 'button_count': 3 })
+    config.load()
+    controls = config.CONTROLS
+    write_config({ 'button_count': 'three' })
+    with pytest.raises(config.ConfigError):
+        config.reload()
+    (config_dir / config.CONFIG_FILE).write_text('{ "button_count": ')
+    with pytest.raises(ValueError):
+        config.reload()
+    assert config.BUTTON_COUNT == 3
+    assert config.CONTROLS is controls
+
+def test_missing_file_is_not_created(config_dir):
+    write_config({ 'button_count': 3 })
+    config.load()
+    os.remove(config.CONFIG_FILE)
+    with pytest.raises(config.ConfigError):
+        config.reload()
+    assert not os.path.exists(config.CONFIG_FILE)
+    assert config.BUTTON_COUNT == 3
+
+def test_apply_config_reuses_widgets(qapp, make_overlay, capsys):
+    write_config({ 'auto_fill': False, 'controls': CONTROLS })
+    config.load()
+    window = make_overlay(20)
+    overlay_widget = window.centralWidget()
+    before = list(overlay_widget.active_controls)
+    assert [ widget.control.name for widget in before ][:2] == [ 'Master', 'Browser' ]
+
+    # Only colors change, every widget is kept and restyled
+    write_config({ 'auto_fill': False, 'fg_color': '#123456', 'controls': CONTROLS })
+    assert 'CONTROLS' in config.reload()
+    capsys.readouterr()
+    overlay_widget.apply_config(config.CONTROLS)
+    assert f'0 created, 0 removed, 0 moved, {len(before)} restyled' in capsys.readouterr().out
+    assert overlay_widget.active_controls == before
+    assert all(widget.control.fg_color == '#123456' for widget in before)
+
+    # A new control in front moves the others down without building them again
+    write_config({ 'auto_fill': False, 'controls': [ { 'name': 'Voice', 'target_applications': [ 'discord' ] } ] + CONTROLS })
+    config.reload()
+    overlay_widget.apply_config(config.CONTROLS)
+    assert overlay_widget.active_controls[1:] == before
+    assert overlay_widget.active_controls[0].control.name == 'Voice'
+
+def test_watcher_reloads_and_survives_deletion(qapp, make_overlay, capsys):
+    write_config({ 'auto_fill': False, 'controls': CONTROLS })
+    config.load()
+    config.WATCH_CONFIG = True
+    window = make_overlay(20)
+    overlay_widget = window.centralWidget()
+    write_config({ 'auto_fill': False, 'bg_color': '#654321', 'controls': CONTROLS })
+    assert wait_for(qapp, lambda: config.BG_COLOR == '#654321')
+
+    os.remove(config.CONFIG_FILE)
+    assert wait_for(qapp, lambda: 'Keeping the current config' in capsys.readouterr().out)
+    assert not os.path.exists(config.CONFIG_FILE)
+    assert config.BG_COLOR == '#654321'
+
+    # Watched again once it comes back
+    write_config({ 'auto_fill': False, 'bg_color': '#abcdef', 'controls': CONTROLS })
+    assert wait_for(qapp, lambda: config.BG_COLOR == '#abcdef')
+    assert window.config_watcher.files() == [ config.CONFIG_FILE ]
+    assert all(widget.control.bg_color == '#abcdef' for widget in overlay_widget.active_controls)
@@ -0,0 +1,57 @@
+import pytest
+from audio import FakeAudioBackend, FakeSession
+from sessions import FakeSessionSource, SessionRegistry
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def registry(clock, notifications: bool):
+    source = FakeSessionSource(FakeAudioBackend.generate(3), notifications)
+    return source, SessionRegistry(source, 1.0, clock)
+
+def test_notifications_flow_through_process(clock):
+    source, sessions = registry(clock, True)
+    assert sessions.notifying and len(sessions.all()) == 3
+    new = FakeSession(2000, 'vlc.exe')
+    source.start(new)
+    assert sessions.process() == ([ new ], [])
+    old = source.backend.sessions[0]
+    source.stop(old)
+    assert sessions.process() == ([], [ old ])
+    assert old not in sessions.all() and new in sessions.all()
+    # Nothing is polled while notifications arrive
+    clock.now += 10
+    assert sessions.process() == ([], [])
+    assert source.snapshots == 1
+
+def test_polling_waits_for_poll_interval(clock):
+    source, sessions = registry(clock, False)
+    assert not sessions.notifying
+    new = FakeSession(2000, 'vlc.exe')
+    source.start(new)
+    old = source.backend.sessions[0]
+    source.stop(old)
+    clock.now += 0.5
+    assert sessions.process() == ([], [])
+    assert source.snapshots == 1
+    clock.now += 0.5
+    assert sessions.process() == ([ new ], [ old ])
+    assert source.snapshots == 2
+    clock.now += 0.9
+    assert sessions.process() == ([], [])
+    assert source.snapshots == 2
+
+def test_repeated_events_are_ignored(clock):
+    source, sessions = registry(clock, True)
+    session = source.backend.sessions[0]
+    source.created(session) # Already known from the first snapshot
+    sessions.expired('unknown')
+    assert sessions.process() == ([], [])
@@ -0,0 +1,36 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(cwd, *args) -> subprocess.CompletedProcess:
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    return subprocess.run([ sys.executable, *args ], cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+
+def test_profile_startup_within_budget(tmp_path):
+    # The first run writes the config and steam game cache, the second one is a warm start
+    run(tmp_path, os.path.join(ROOT, 'main.py'), '--profile-startup')
+    result = run(tmp_path, os.path.join(ROOT, 'main.py'), '--profile-startup')
+    assert result.returncode == 0, result.stdout + result.stderr
+    budget = re.search(r'Non GUI startup: ([\d.]+)ms of (\d+)ms budget', result.stdout)
+    assert budget is not None, result.stdout
+    assert float(budget.group(1)) <= float(budget.group(2))
+    for name in ('import_config', 'config', 'steam_games', 'matcher', 'import_gui'):
+        assert re.search(rf'^  {name} ', result.stdout, re.MULTILINE), name
+
+def test_profile_startup_invalid_config(tmp_path):
+    (tmp_path / 'conf.json').write_text('{"monitor": "left", "controls": [{"name": 1}]}')
+    result = run(tmp_path, os.path.join(ROOT, 'main.py'), '--profile-startup')
+    assert result.returncode == 1
+    assert 'monitor: expected int, got str' in result.stdout
+    assert 'controls[0].name: expected str, got int' in result.stdout
+    assert 'import_gui' not in result.stdout
+    assert 'Traceback' not in result.stderr
+
+def test_non_gui_startup_skips_qt(tmp_path):
+    script = 'import sys, config, matcher, steamgames; config.load(); print(sorted(m for m in sys.modules if m.split(".")[0] in ("PySide6", "comtypes", "pycaw")))'
+    result = run(tmp_path, '-c', f'import sys; sys.path.insert(0, {ROOT!r}); {script}')
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == '[]'
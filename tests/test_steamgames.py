@@ -0,0 +1,80 @@
+import os
+import pytest
+from ujson import dump as json_dump, load as json_load
+from steamgames import collect_steam_games, find_and_write_steamgames_cache, load_steamgames_cache, read_library_index, read_steamgames_cache, scan_library_folders
+
+def touch(file_name: str):
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    open(file_name, 'w').close()
+
+def make_library(root: str, game_count: int, second_library: bool = True) -> list:
+    """Writes a fake Steam install, a second library is listed in its libraryfolders.vdf."""
+    libraries = [ os.path.join(root, 'Steam') ] + ([ os.path.join(root, 'Library') ] if second_library else [])
+    for i, library in enumerate(libraries):
+        steamapps = os.path.join(library, 'steamapps')
+        os.makedirs(steamapps)
+        for n in range(game_count):
+            game = f'Game{i}x{n}'
+            appid = i * 100000 + n
+            with open(os.path.join(steamapps, f'appmanifest_{appid}.acf'), 'w') as file:
+                file.write(f'"AppState"\n{{\n\t"appid"\t\t"{appid}"\n\t"installdir"\t\t"{game}"\n}}\n')
+            common = os.path.join(steamapps, 'common', game)
+            touch(os.path.join(common, f'{game}.exe'))
+            touch(os.path.join(common, 'bin', f'{game}Helper.exe'))
+            touch(os.path.join(common, 'bin', 'deep', f'{game}Deep.exe'))
+            touch(os.path.join(common, 'unins000.exe'))
+            touch(os.path.join(common, 'UnityCrashHandler64.exe'))
+            touch(os.path.join(common, 'readme.txt'))
+        # Left behind by an uninstall, not in any manifest
+        touch(os.path.join(steamapps, 'common', 'Removed', 'Removed.exe'))
+    if second_library:
+        with open(os.path.join(libraries[0], 'steamapps', 'libraryfolders.vdf'), 'w') as file:
+            path = libraries[1].replace('\\', '\\\\')
+            file.write(f'"libraryfolders"\n{{\n\t"1"\n\t{{\n\t\t"path"\t\t"{path}"\n\t}}\n}}\n')
+    return libraries[:1]
+
+def test_scan_finds_manifest_games(tmp_path):
+    folders = make_library(str(tmp_path), 3)
+    games = collect_steam_games(scan_library_folders(folders, {}), [ '.*helper' ])
+    assert sorted(games) == sorted(f'game{i}x{n}' for i in range(2) for n in range(3))
+
+def test_index_rescans_only_changed_directories(tmp_path, monkeypatch):
+    folders = make_library(str(tmp_path), 3)
+    cache_file = str(tmp_path / 'games.cache')
+    index_file = str(tmp_path / 'games.index')
+    find_and_write_steamgames_cache(folders, cache_file, [], index_file)
+    assert len(read_library_index(index_file)) == 6
+
+    import steamgames
+    scanned = []
+    scan_game_directory = steamgames.scan_game_directory
+    monkeypatch.setattr(steamgames, 'scan_game_directory', lambda path: scanned.append(path) or scan_game_directory(path))
+    changed = os.path.join(str(tmp_path), 'Steam', 'steamapps', 'common', 'Game0x1')
+    touch(os.path.join(changed, 'Added.exe'))
+    cache = find_and_write_steamgames_cache(folders, cache_file, [], index_file)
+    assert scanned == [ changed ]
+    assert 'added' in cache['games']
+
+def test_cache_reused_until_library_changes(tmp_path):
+    folders = make_library(str(tmp_path), 2, second_library=False)
+    cache_file = str(tmp_path / 'games.cache')
+    first = load_steamgames_cache(folders, cache_file, 60, [])
+    assert load_steamgames_cache(folders, cache_file, 60, [])['created'] == first['created']
+    os.makedirs(os.path.join(folders[0], 'steamapps', 'common', 'NewGame'))
+    assert load_steamgames_cache(folders, cache_file, 60, [])['created'] != first['created']
+
+@pytest.mark.parametrize('field, value', [ ('created', None), ('created', 'yesterday'), ('library_folders', None), ('libraries', None), ('exclusions', None), ('games', None) ])
+def test_damaged_cache_is_rebuilt(tmp_path, field, value):
+    folders = make_library(str(tmp_path), 2, second_library=False)
+    cache_file = str(tmp_path / 'games.cache')
+    first = load_steamgames_cache(folders, cache_file, 60, [])
+    with open(cache_file) as file:
+        cache = json_load(file)
+    if value is None:
+        del cache[field]
+    else:
+        cache[field] = value
+    with open(cache_file, 'w') as file:
+        json_dump(cache, file)
+    assert read_steamgames_cache(cache_file, 60, folders, []) is None
+    assert sorted(load_steamgames_cache(folders, cache_file, 60, [])['games']) == sorted(first['games'])
@@ -0,0 +1,43 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import telemetry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MALFORMED = [ 'not json', '{"name": "frame"', '[1, 2]', '{"ms": 3}', '{"name": "frame"}', '{"name": "frame", "ms": "slow"}', '{"name": ["frame"], "ms": 1}', '' ]
+
+def write_metrics(file_name: str):
+    samples = [ { 'name': 'frame', 'ms': float(ms), 't': 0 } for ms in range(1, 101) ] + [ { 'name': 'key_to_apply', 'ms': 7.5, 't': 0 } ]
+    lines = [ json.dumps(sample) for sample in samples ] + MALFORMED
+    random.Random(0).shuffle(lines)
+    with open(file_name, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+def test_percentile_is_nearest_rank():
+    values = [ 1, 2, 3, 4 ]
+    assert [ telemetry.percentile(values, p) for p in (0, 25, 50, 51, 100) ] == [ 1, 1, 2, 3, 4 ]
+    assert telemetry.percentile([ 5 ], 99) == 5
+
+def test_summarize_skips_malformed_lines(tmp_path):
+    file_name = str(tmp_path / 'metrics.jsonl')
+    write_metrics(file_name)
+    summary = telemetry.summarize(file_name)
+    assert summary == {
+        'frame': { 'count': 100, 'p50': 50, 'p95': 95, 'p99': 99, 'max': 100 },
+        'key_to_apply': { 'count': 1, 'p50': 7.5, 'p95': 7.5, 'p99': 7.5, 'max': 7.5 }
+    }
+
+def test_summary_cli(tmp_path):
+    file_name = str(tmp_path / 'metrics.jsonl')
+    write_metrics(file_name)
+    result = subprocess.run([ sys.executable, os.path.join(ROOT, 'telemetry.py'), file_name ], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    header, *rows = result.stdout.splitlines()
+    assert header.split() == [ 'metric', 'count', 'p50', 'ms', 'p95', 'ms', 'p99', 'ms', 'max', 'ms' ]
+    assert [ row.split() for row in rows ] == [
+        [ 'frame', '100', '50.000', '95.000', '99.000', '100.000' ],
+        [ 'key_to_apply', '1', '7.500', '7.500', '7.500', '7.500' ]
+    ]
+    assert subprocess.run([ sys.executable, os.path.join(ROOT, 'telemetry.py') ], capture_output=True, timeout=30).returncode == 1
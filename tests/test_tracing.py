@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+import telemetry
+from audio import FakeAudioBackend
+from backends import Backends
+from sessions import FakeSessionSource
+from titles import FakeWindowBackend
+from tracing import TraceRecorder, read_trace, recorded_latencies
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LATENCIES = { 'ActivateEndpoint': 0.005, 'GetMasterVolumeLevelScalar': 0.01, 'SetMasterVolumeLevelScalar': 0.02 }
+TITLE_LATENCY = 0.015
+
+def call_times(file_name: str) -> dict:
+    times = {}
+    for event in read_trace(file_name):
+        if event[1] == 'call':
+            times.setdefault(event[2], []).append(event[3])
+    return times
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch, config_dir):
+    """Records a trace with telemetry on as well, so the backend calls are timed for both."""
+    import overlay
+    from PySide6.QtCore import Qt
+    monkeypatch.setattr(telemetry, 'enabled', False)
+    monkeypatch.setattr(telemetry, 'recorder', None)
+    telemetry.enable(str(tmp_path / 'metrics.jsonl'))
+    trace_recorder = TraceRecorder(str(tmp_path / 'trace.jsonl'))
+    monkeypatch.setattr(overlay, 'trace_recorder', trace_recorder)
+    audio = FakeAudioBackend.generate(2, latencies=LATENCIES)
+    windows = FakeWindowBackend.for_sessions(audio.sessions)
+    windows.latencies['GetWindowText'] = TITLE_LATENCY
+    overlay.set_backends(Backends(audio, windows, FakeSessionSource(audio)))
+    for level in (0.9, 0.8):
+        overlay.audio_backend.get_master_volume()
+        overlay.audio_backend.set_master_volume(level)
+        overlay.backends.windows.title(0x10000)
+    trace_recorder.show()
+    trace_recorder.key(Qt.Key_1, '1')
+    trace_recorder.key(Qt.Key_Down, '')
+    trace_recorder.hide()
+    return str(tmp_path / 'trace.jsonl')
+
+def test_stacked_sinks_record_real_latencies(trace_file, tmp_path):
+    traced = call_times(trace_file)
+    measured = telemetry.summarize(str(tmp_path / 'metrics.jsonl'))
+    for name, latency in list(LATENCIES.items()) + [ ('GetWindowText', TITLE_LATENCY) ]:
+        assert min(traced[name]) >= latency * 1000, name
+        assert measured[name]['p50'] >= latency * 1000, name
+    # The activation inside the first read is not counted twice
+    assert max(traced['GetMasterVolumeLevelScalar']) < (LATENCIES['GetMasterVolumeLevelScalar'] + LATENCIES['ActivateEndpoint']) * 1000
+
+def test_fake_backends_take_recorded_latencies(trace_file):
+    latencies = recorded_latencies(read_trace(trace_file))
+    windows = FakeWindowBackend({ 1: (1, 'Title') }, latencies={ 'GetWindowText': latencies['GetWindowText'] })
+    start = time.perf_counter()
+    windows.title(1)
+    assert time.perf_counter() - start >= TITLE_LATENCY
+    audio = FakeAudioBackend(latencies=latencies)
+    start = time.perf_counter()
+    audio.set_master_volume(0.5)
+    assert time.perf_counter() - start >= LATENCIES['SetMasterVolumeLevelScalar'] + LATENCIES['ActivateEndpoint']
+
+def test_replay_reproduces_latencies(trace_file, tmp_path):
+    (tmp_path / 'conf.json').write_text(json.dumps({ 'auto_fill': False, 'watch_config': False, 'controls': [ { 'name': 'Master', 'master': True } ] }))
+    metrics_file = str(tmp_path / 'replay.jsonl')
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([ sys.executable, os.path.join(ROOT, 'tracing.py'), 'replay', trace_file, metrics_file ], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    replayed = telemetry.summarize(metrics_file)
+    for name in ('GetMasterVolumeLevelScalar', 'SetMasterVolumeLevelScalar'):
+        assert replayed[name]['p50'] >= LATENCIES[name] * 1000, name
+    assert replayed['key_to_apply']['max'] >= LATENCIES['SetMasterVolumeLevelScalar'] * 1000
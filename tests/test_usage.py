@@ -0,0 +1,80 @@
+import pytest
+from usage import UsageHistory, order_by_ranking, rank_names
+
+HOUR = 3600
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def history(tmp_path, clock):
+    return UsageHistory(str(tmp_path / 'usage.json'), HOUR, clock)
+
+def test_uses_decay_by_half_life(history, clock):
+    history.record('spotify')
+    history.record('spotify')
+    assert history.score('spotify') == 2
+    clock.now += HOUR
+    assert history.score('spotify') == pytest.approx(1)
+    history.record('spotify')
+    clock.now += 2 * HOUR
+    assert history.score('spotify') == pytest.approx(0.5)
+    assert history.score('vlc') == 0
+
+def test_history_round_trips(history, tmp_path, clock):
+    history.record('discord')
+    history.save()
+    loaded = UsageHistory(str(tmp_path / 'usage.json'), HOUR, clock)
+    loaded.load()
+    assert loaded.score('discord') == 1
+
+def test_top_k_by_activity_and_usage(history, clock):
+    sessions = [ (i, name) for i, name in enumerate([ 'chrome', 'vlc', 'discord', 'spotify', 'zoom' ]) ]
+    history.record('discord')
+    history.record('discord')
+    history.record('zoom')
+    clock.now += HOUR
+    # A session at full level for the whole window outweighs a use decayed by one half life
+    activity = { 1: 1.0 }
+    assert rank_names(sessions, 3, activity, history) == [ 'vlc', 'discord', 'zoom' ]
+    assert rank_names(sessions, 1, {}, history) == [ 'discord' ]
+
+def test_ties_keep_session_order(history):
+    sessions = [ (0, 'zoom'), (1, 'chrome'), (2, 'vlc'), (3, 'chrome') ]
+    assert rank_names(sessions, 2, {}, history) == [ 'zoom', 'chrome' ]
+    assert rank_names(sessions, 5, {}, history) == [ 'zoom', 'chrome', 'vlc' ]
+    # Every busy session of an app adds up
+    assert rank_names(sessions, 1, { 1: 0.3, 2: 0.5, 3: 0.3 }, history) == [ 'chrome' ]
+
+def test_ranked_sessions_move_to_the_front():
+    sessions = [ (0, 'zoom'), (1, 'chrome'), (2, 'vlc'), (3, 'chrome') ]
+    assert order_by_ranking(sessions, [ 'vlc', 'chrome' ]) == [ (2, 'vlc'), (1, 'chrome'), (3, 'chrome'), (0, 'zoom') ]
+    assert order_by_ranking(sessions, []) == sessions
+
+def test_auto_fill_takes_ranked_apps_first(qapp, make_overlay, monkeypatch, history):
+    import config
+    import overlay
+    auto_fill = config.Control('App', [ '<all>' ], False, True, True)
+    config.BUTTON_COUNT = 2
+    window = make_overlay(6, [ auto_fill ] * 2)
+    overlay_widget = window.centralWidget()
+    sessions = overlay.audio_backend.sessions
+    names = [ overlay.process_cache.name(session) for session in sessions ]
+    unranked = [ widget.sessions[0] for widget in overlay_widget.active_controls ]
+    assert unranked[0] is sessions[0] and names[0] != names[-1]
+
+    monkeypatch.setattr(overlay, 'usage_history', history)
+    history.record(names[-1])
+    config.RANK_AUTO_FILL = True
+    overlay_widget.refresh(sessions)
+    shown = [ overlay.process_cache.name(widget.sessions[0]) for widget in overlay_widget.active_controls ]
+    assert overlay_widget.ranking[0] == names[-1]
+    assert shown[0] == names[-1]
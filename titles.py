@@ -0,0 +1,107 @@
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+
+class WindowBackend:
+    def windows(self) -> Iterable[Tuple[int, int]]:
+        """Yields (hwnd, pid) for every top level window in z-order."""
+        raise NotImplementedError
+
+    def title(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+class Win32WindowBackend(WindowBackend):
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        user32 = ctypes.windll.user32
+        self.EnumWindows = user32.EnumWindows
+        self.EnumWindowsProc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self.GetWindowTextLengthW = user32.GetWindowTextLengthW
+        self.GetWindowTextW = user32.GetWindowTextW
+        self.GetWindowThreadProcessId = user32.GetWindowThreadProcessId
+        self.DWORD = wintypes.DWORD
+
+    def windows(self) -> Iterable[Tuple[int, int]]:
+        windows = []
+        pid = self.DWORD(0)
+        pid_ref = self.ctypes.byref(pid)
+        def enum_windows_cb(hwnd, _):
+            self.GetWindowThreadProcessId(hwnd, pid_ref)
+            windows.append((hwnd, pid.value))
+            return True
+        self.EnumWindows(self.EnumWindowsProc(enum_windows_cb), 0)
+        return windows
+
+    def title(self, hwnd: int) -> str:
+        l = self.GetWindowTextLengthW(hwnd)
+        buf = self.ctypes.create_unicode_buffer(l + 1)
+        self.GetWindowTextW(hwnd, buf, l + 1)
+        return buf.value
+
+class FakeWindowBackend(WindowBackend):
+    """latencies are keyed by the telemetry names EnumWindows and GetWindowText, in seconds or a function returning them."""
+
+    def __init__(self, windows: Dict[int, Tuple[int, str]] = None, latency: float = 0.0, latencies: Dict[str, Union[float, Callable[[], float]]] = None):
+        self.table = dict(windows or {}) # hwnd: (pid, title)
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.enum_calls = 0
+        self.title_calls = 0
+
+    def delay(self, name: str):
+        latency = self.latencies.get(name, self.latency)
+        if callable(latency):
+            latency = latency()
+        if latency > 0:
+            time.sleep(latency)
+
+    @classmethod
+    def for_sessions(cls, sessions: list, latency: float = 0.0) -> 'FakeWindowBackend':
+        """One titled window per session process."""
+        return cls({ 0x10000 + i: (session.ProcessId, f'{session.Process._name[:-4].capitalize()} Window {i + 1}') for i, session in enumerate(sessions) if session.Process is not None }, latency)
+
+    def windows(self) -> Iterable[Tuple[int, int]]:
+        self.enum_calls += 1
+        self.delay('EnumWindows')
+        return [ (hwnd, pid) for hwnd, (pid, _) in self.table.items() ]
+
+    def title(self, hwnd: int) -> str:
+        self.title_calls += 1
+        self.delay('GetWindowText')
+        return self.table[hwnd][1] if hwnd in self.table else ''
+
+class TitleResolver:
+    def __init__(self, backend: WindowBackend, ttl: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self.handles = {}
+        self.handles_time = None
+        self.titles = {}
+
+    def invalidate(self):
+        self.handles_time = None
+        self.titles.clear()
+
+    def expired(self, t: Optional[float]) -> bool:
+        return t is None or self.clock() - t > self.ttl
+
+    def window_handle(self, pid: int) -> Optional[int]:
+        if self.expired(self.handles_time):
+            handles = {}
+            for hwnd, _pid in self.backend.windows():
+                handles.setdefault(_pid, hwnd)
+            self.handles = handles
+            self.handles_time = self.clock()
+        return self.handles.get(pid)
+
+    def title(self, pid: int) -> str:
+        cached = self.titles.get(pid)
+        if cached is not None and not self.expired(cached[1]):
+            return cached[0]
+        hwnd = self.window_handle(pid)
+        title = self.backend.title(hwnd) if hwnd is not None else ''
+        self.titles[pid] = (title, self.clock())
+        return title
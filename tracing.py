@@ -0,0 +1,153 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import List, Optional
+from ujson import dumps as json_dumps, loads as json_loads
+
+TRACE_VERSION = 1
+
+class TraceRecorder:
+    """Writes key presses, session snapshots and backend call timings as compact JSON lines.
+
+    Every line is a list starting with the time in seconds since recording started and the event kind.
+    """
+
+    def __init__(self, file_name: str):
+        self.file = open(file_name, 'a', buffering=1)
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.write([ 'start', TRACE_VERSION, time.time() ])
+
+    def write(self, event: list):
+        line = json_dumps([ round(time.perf_counter() - self.start, 6) ] + event)
+        with self.lock:
+            self.file.write(line + '\n')
+
+    def key(self, key: int, text: str):
+        self.write([ 'key', key, text ])
+
+    def show(self):
+        self.write([ 'show' ])
+
+    def hide(self):
+        self.write([ 'hide' ])
+
+    def sessions(self, sessions: list, master: Optional[float]):
+        """sessions is a list of (pid, exe name, display name, volume level or None)."""
+        self.write([ 'sessions', [ list(session) for session in sessions ], master ])
+
+    def call(self, name: str, ms: float):
+        self.write([ 'call', name, round(ms, 4) ])
+
+def read_trace(file_name: str) -> List[list]:
+    events = []
+    with open(file_name) as file:
+        for line in file:
+            try:
+                events.append(json_loads(line))
+            except ValueError:
+                continue
+    return events
+
+def recorded_latencies(events: List[list]) -> dict:
+    # Each fake call takes the recorded durations of its kind in turn
+    durations = defaultdict(list)
+    for event in events:
+        if event[1] == 'call':
+            durations[event[2]].append(event[3] / 1000)
+    return { name: (lambda values=itertools.cycle(values): next(values)) for name, values in durations.items() }
+
+def replay(file_name: str, metrics_file: str, speed: float = 1.0) -> int:
+    """Feeds a recorded trace through the overlay with a fake backend and summarizes the measured latencies."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import config
+    config.load()
+    config.BACKEND = 'fake'
+    config.FAKE_SESSION_COUNT = 0
+    config.TRACE_FILE = ''
+    config.PEAK_METERS = False
+    config.RANK_AUTO_FILL = False
+    config.MONITOR = 0 # The offscreen platform has a single screen
+    if os.path.exists(metrics_file):
+        os.remove(metrics_file)
+    import telemetry
+    telemetry.enable(metrics_file)
+
+    from PySide6 import QtCore, QtGui, QtWidgets
+    from PySide6.QtCore import Qt
+    import overlay
+    from audio import FakeAudioBackend, FakeSession
+    from backends import Backends
+    from sessions import FakeSessionSource, SessionRegistry
+    from titles import FakeWindowBackend
+
+    events = read_trace(file_name)
+    if not events or events[0][1] != 'start':
+        print(f'{file_name} is not a trace')
+        return 1
+    latencies = recorded_latencies(events)
+    if 'Process.name' in latencies:
+        latencies['ProcessName'] = latencies.pop('Process.name')
+    # Window calls take their own recorded durations too
+    windows = FakeWindowBackend(latencies={ name: latencies.pop(name) for name in ('EnumWindows', 'GetWindowText') if name in latencies })
+    audio = FakeAudioBackend(latencies=latencies)
+    source = FakeSessionSource(audio)
+    overlay.set_backends(Backends(audio, windows, source))
+
+    app = QtWidgets.QApplication([])
+    window = overlay.Overlay([], True)
+    registry = SessionRegistry(source, config.SESSION_POLL_INTERVAL / 1000)
+    window.startup_loaded('sessions', registry)
+    window.show()
+    running = {}
+
+    def apply_sessions(sessions: list, master: Optional[float]):
+        seen = set()
+        for pid, exe_name, display_name, level in sessions:
+            seen.add(pid)
+            if pid not in running:
+                running[pid] = FakeSession(pid, exe_name, level if level is not None else 1.0, display_name)
+                windows.table[0x10000 + pid] = (pid, display_name or exe_name[:-4].capitalize())
+                source.start(running[pid])
+        for pid in [ pid for pid in running if pid not in seen ]:
+            source.stop(running.pop(pid))
+        if master is not None:
+            audio.master = master
+
+    def dispatch(event: list):
+        kind = event[1]
+        if kind == 'key':
+            window.keyPressEvent(QtGui.QKeyEvent(QtCore.QEvent.KeyPress, event[2], Qt.NoModifier, event[3]))
+        elif kind == 'show':
+            window.summon()
+        elif kind == 'hide':
+            window.dismiss()
+        elif kind == 'sessions':
+            apply_sessions(event[2], event[3])
+            window.centralWidget().update_sessions()
+
+    replayed = [ event for event in events if event[1] in ('key', 'show', 'hide', 'sessions') ]
+    for event in replayed:
+        QtCore.QTimer.singleShot(round(event[0] * 1000 / speed), lambda event=event: dispatch(event))
+    end = replayed[-1][0] * 1000 / speed if replayed else 0
+    QtCore.QTimer.singleShot(round(end) + 500, app.quit)
+    app.exec()
+    overlay.volume_writer.flush()
+
+    summary = telemetry.summarize(metrics_file)
+    print(f'Replayed {len(replayed)} events from {file_name}')
+    telemetry.print_summary({ name: s for name, s in summary.items() if name in ('key_to_apply', 'frame') or name.startswith('paint:') })
+    return 0
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] != 'replay':
+        print('Usage: tracing.py replay <trace file> [metrics file] [speed]')
+        sys.exit(1)
+    sys.exit(replay(args[1], args[2] if len(args) > 2 else 'replay.jsonl', float(args[3]) if len(args) > 3 else 1.0))
+
+if __name__ == "__main__":
+    main()
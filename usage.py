@@ -0,0 +1,66 @@
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from ujson import dump as json_dump, load as json_load
+
+ACTIVITY_WEIGHT = 4 # A session playing at full level for the whole sample window counts as this many recent uses
+
+class UsageHistory:
+    """How often each app was adjusted, every use decays by half after half_life seconds."""
+
+    def __init__(self, file_name: str, half_life: float = 72 * 3600, clock: Callable[[], float] = time.time):
+        self.file_name = file_name
+        self.half_life = half_life
+        self.clock = clock
+        self.entries = {} # name: (score, time)
+        self.changed = False
+
+    def load(self):
+        try:
+            with open(self.file_name) as file:
+                self.entries = { name: (float(score), float(t)) for name, (score, t) in json_load(file).items() }
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f'Ignoring invalid usage history {self.file_name}: {e}')
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            with open(self.file_name, 'w') as file:
+                json_dump(self.entries, file)
+            self.changed = False
+        except OSError as e:
+            print(f'Unable to write usage history: {e}')
+
+    def score(self, name: str, now: Optional[float] = None) -> float:
+        entry = self.entries.get(name)
+        if entry is None:
+            return 0.0
+        score, t = entry
+        return score * 0.5 ** (max(0, (now if now is not None else self.clock()) - t) / self.half_life)
+
+    def record(self, name: str):
+        now = self.clock()
+        self.entries[name] = (self.score(name, now) + 1, now)
+        self.changed = True
+
+def rank_names(named_sessions: List[Tuple[object, str]], k: int, activity: Dict[object, float], history: UsageHistory) -> List[str]:
+    """The k app names with the highest activity and usage score, ties keep the session order."""
+    now = history.clock()
+    scores = {}
+    for session, name in named_sessions:
+        score = activity.get(session, 0.0) * ACTIVITY_WEIGHT
+        if name not in scores:
+            scores[name] = score + history.score(name, now)
+        elif score > 0:
+            scores[name] += score
+    order = { name: i for i, name in enumerate(scores) }
+    return heapq.nlargest(k, scores, key=lambda name: (scores[name], -order[name]))
+
+def order_by_ranking(named_sessions: List[Tuple[object, str]], ranking: List[str]) -> List[Tuple[object, str]]:
+    """Moves the sessions of ranked apps to the front, in ranking order."""
+    position = { name: i for i, name in enumerate(ranking) }
+    ranked = sorted((pair for pair in named_sessions if pair[1] in position), key=lambda pair: position[pair[1]])
+    return ranked + [ pair for pair in named_sessions if pair[1] not in position ]
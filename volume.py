@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+import telemetry
+
+
+class VolumeWriter:
+    """Applies volume writes on a worker thread, keeping only the latest write per key."""
+
+    def __init__(self, backend, interval: float = 0.016, workers: int = 4):
+        self.backend = backend
+        self.interval = interval
+        # Group writes are spread over a pool, each worker prepared like the writer thread
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='VolumeWriterPool', initializer=backend.thread_init) if workers > 1 else None
+        self.pending = {}
+        self.applying = False
+        self.submitted = 0
+        self.applied = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name='VolumeWriter', daemon=True)
+        self.thread.start()
+
+    def submit(self, key: Hashable, fn: Callable, *args, started: float = None):
+        """started is the perf_counter time of the input that caused the write, for the key to apply latency."""
+        with self.condition:
+            # Coalesced writes keep the oldest input time
+            if key in self.pending and self.pending[key][2] is not None:
+                started = self.pending[key][2]
+            self.pending[key] = (fn, args, started)
+            self.submitted += 1
+            self.condition.notify_all()
+
+    def run(self):
+        self.backend.thread_init()
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                writes = self.pending
+                self.pending = {}
+                self.applying = True
+            start = time.monotonic()
+            for fn, args, started in writes.values():
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f'Volume write failed: {e}')
+                if started is not None:
+                    telemetry.record_since('key_to_apply', started)
+            with self.condition:
+                self.applied += len(writes)
+                self.applying = False
+                self.condition.notify_all()
+            # Bound the write rate, later submits coalesce in the meantime
+            time.sleep(max(0, self.interval - (time.monotonic() - start)))
+
+    def apply_all(self, fn: Callable, items: Iterable[Tuple]):
+        """Calls fn with every item's arguments concurrently and waits for all of them."""
+        items = list(items)
+        if self.pool is None or len(items) < 2:
+            for args in items:
+                fn(*args)
+            return
+        errors = [ future.exception() for future in [ self.pool.submit(fn, *args) for args in items ] ]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.applying, timeout)
+
+class GroupVolume:
+    """The level of a group of sessions, every session keeps its ratio to the loudest one as the group level moves."""
+
+    def __init__(self, levels: Optional[Dict[Hashable, float]] = None):
+        self.set_levels(levels or {})
+
+    def set_levels(self, levels: Dict[Hashable, float]):
+        self.level = max(levels.values(), default=1.0)
+        self.ratios = { key: level / self.level if self.level > 0 else 1.0 for key, level in levels.items() }
+
+    def levels(self) -> Dict[Hashable, float]:
+        return { key: ratio * self.level for key, ratio in self.ratios.items() }
+
+    def step(self, delta: float) -> Optional[Dict[Hashable, float]]:
+        """Moves the group level, returns the new level of every session or None if the level is clamped."""
+        level = max(0, min(1, self.level + delta))
+        if level == self.level:
+            return None
+        self.level = level
+        return self.levels()